@@ -0,0 +1,253 @@
+import atexit
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import receiver
+
+from .models import UserActivity, UserStats
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FIELDS = ('user_id', 'tournament_id', 'reward_id', 'activity_type', 'description', 'points_change')
+
+
+def read_journal(path):
+    """The events in a journal, skipping a last line left half-written by a crash."""
+    text = path.read_text(encoding='utf-8')
+    lines = text.split('\n')
+    if lines[-1]:
+        logger.warning('Skipping truncated last line of activity journal %s', path.name)
+    return [json.loads(line) for line in lines[:-1] if line.strip()]
+
+
+class ActivityWriter:
+    """
+    Buffer activity rows in-process and write them with ``bulk_create``.
+
+    Every event is appended to this writer's journal before it is buffered,
+    and the journal is only discarded once its rows are in the database, so a
+    crash loses nothing: the writer thread of the next process replays orphaned
+    journals. Journals are named by a token unique to each writer, which holds
+    an exclusive lock on ``<token>.lock`` for as long as it lives; a lock
+    anyone else can take marks a dead writer whatever its PID. Delivery is
+    at-least-once. ``created_at`` is stamped at flush time, at most one flush
+    interval after the event.
+    """
+
+    def __init__(self, spool_dir, batch_size=500, flush_interval=1.0):
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = []
+        self._journal = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self.token = f'{os.getpid()}-{uuid.uuid4().hex[:12]}'
+        self._owner_lock = None
+
+    @property
+    def journal_path(self):
+        return self.spool_dir / f'{self.token}.jsonl'
+
+    def _claim_token(self):
+        # Held until the process exits; the OS releases it however the process ends.
+        if self._owner_lock is None:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            self._owner_lock = open(self.spool_dir / f'{self.token}.lock', 'w')
+            fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+
+    def _open_journal(self):
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _start(self):
+        self._claim_token()
+        self._open_journal()
+        self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, **fields):
+        event = {name: fields.get(name) for name in ACTIVITY_FIELDS}
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self._journal.write(json.dumps(event) + '\n')
+            self._journal.flush()
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            # After the caller commits, so its rollback cannot undo rows whose journal is already gone.
+            transaction.on_commit(self.flush, robust=True)
+
+    def _run(self):
+        recovered = False
+        while True:
+            try:
+                if not recovered:
+                    self.recover()
+                    recovered = True
+            except Exception:
+                logger.exception('Activity journal recovery failed; claimed journals are kept for retry')
+            finally:
+                close_old_connections()
+            if self._stopped.wait(self.flush_interval):
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Activity flush failed; events kept in the journal for retry')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, []
+                self._journal.close()
+                pending = self.journal_path.with_suffix('.flushing')
+                os.replace(self.journal_path, pending)
+                self._open_journal()
+            try:
+                with transaction.atomic():
+                    write_events(batch)
+            except Exception:
+                with self._lock:
+                    self._buffer[:0] = batch
+                    self._journal.write(pending.read_text(encoding='utf-8'))
+                    self._journal.flush()
+                pending.unlink()
+                raise
+            pending.unlink()
+            return len(batch)
+
+    def recover(self):
+        """Replay journals left behind by writers that are no longer running."""
+        if not self.spool_dir.exists():
+            return 0
+        self._claim_token()
+        for lock_path in self.spool_dir.glob('*.lock'):
+            if lock_path.stem != self.token:
+                self._claim_orphans(lock_path)
+        replayed = 0
+        for path in sorted(self.spool_dir.glob(f'{self.token}.replay-*')):
+            events = read_journal(path)
+            with transaction.atomic():
+                write_events(events)
+            path.unlink()
+            replayed += len(events)
+        return replayed
+
+    def _claim_orphans(self, lock_path):
+        try:
+            fd = os.open(lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            return  # another writer claimed these journals first
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # the owner is alive
+            owner = lock_path.stem
+            for path in self.spool_dir.glob(f'{owner}.*'):
+                if path != lock_path:
+                    # The rename is the claim: of two writers recovering at once, only one finds the file.
+                    try:
+                        os.replace(path, self.spool_dir / f'{self.token}.replay-{uuid.uuid4().hex[:12]}')
+                    except FileNotFoundError:
+                        pass
+            lock_path.unlink(missing_ok=True)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._stopped.set()
+        atexit.unregister(self.close)
+        self.flush()
+
+
+def write_events(events):
+    """Insert buffered events and advance each user's ``last_activity_at``."""
+    # Users deleted since the event was queued would fail the whole batch on the FK.
+    live_users = set(User.objects.filter(
+        pk__in={event['user_id'] for event in events}
+    ).values_list('pk', flat=True))
+    events = [event for event in events if event['user_id'] in live_users]
+    if not events:
+        return
+    rows = UserActivity.objects.bulk_create([UserActivity(**event) for event in events])
+    latest = {}
+    for row in rows:
+        latest[row.user_id] = max(latest.get(row.user_id, row.created_at), row.created_at)
+    for user_id, at in latest.items():
+        UserStats.objects.filter(user_id=user_id).update(
+            last_activity_at=Greatest(Coalesce(F('last_activity_at'), at), at)
+        )
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def spool_dir():
+    """
+    The spool for the default database, a subdirectory of ``ACTIVITY_LOG_SPOOL_DIR``.
+
+    Journals only ever replay into the database they were written for, so a
+    dev server, a benchmark and a test run sharing one checkout never pick up
+    each other's events.
+    """
+    database = connections['default'].settings_dict
+    identity = '|'.join(str(database.get(key) or '') for key in ('ENGINE', 'HOST', 'PORT', 'NAME'))
+    return Path(settings.ACTIVITY_LOG_SPOOL_DIR) / hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ActivityWriter(
+                spool_dir(),
+                batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+                flush_interval=settings.ACTIVITY_LOG_FLUSH_INTERVAL,
+            )
+        return _writer
+
+
+def reset_writer():
+    """Flush and stop the process's writer; the next ``get_writer()`` starts a new one."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+@receiver(setting_changed)
+def _activity_settings_changed(setting, **kwargs):
+    if setting.startswith('ACTIVITY_LOG_'):
+        reset_writer()
+
+
+def is_buffered(activity_type, points_change):
+    """Only bookkeeping events go through the buffer; anything touching the ledger stays synchronous."""
+    return (
+        settings.ACTIVITY_LOG_MODE == 'buffered'
+        and points_change == 0
+        and activity_type in settings.ACTIVITY_LOG_BUFFERED_TYPES
+    )
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from .models import (
-    UserProfile, Tournament, TournamentParticipant,
-    Reward, UserReward, Game, UserActivity
+    UserProfile, UserStats, Tournament, TournamentParticipant, TournamentWaitlistEntry,
+    Reward, UserReward, Game, UserActivity,
+    ArchivedActivity, UserActivityDaily
 )
+from .services import LedgerError, leave_tournament, promote_waitlist
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -10,18 +12,58 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_filter = ['role', 'created_at']
     search_fields = ['user__username', 'user__email']
 
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'tournament_count', 'reward_count', 'last_activity_at']
+    search_fields = ['user__username']
+
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
-    list_display = ['title', 'game', 'status', 'start_date', 'prize_pool', 'created_by']
+    list_display = ['title', 'game', 'status', 'start_date', 'prize_pool', 'participant_count',
+                    'max_participants', 'created_by']
     list_filter = ['status', 'game', 'created_at']
     search_fields = ['title', 'game']
     date_hierarchy = 'start_date'
+    readonly_fields = ['participant_count']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # The counter moves through conditional UPDATEs in services; writing back the value the
+        # form was loaded with would undo any join or leave made since.
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key and field.name != 'participant_count'
+        ])
+        if 'max_participants' in form.changed_data:
+            promote_waitlist(obj)
 
 @admin.register(TournamentParticipant)
 class TournamentParticipantAdmin(admin.ModelAdmin):
     list_display = ['user', 'tournament', 'status', 'joined_at']
     list_filter = ['status', 'joined_at']
     search_fields = ['user__username', 'tournament__title']
+    readonly_fields = ['user', 'tournament']
+
+    # Seats are taken through join/roster so the participant counter stays right; removals
+    # go through leave_tournament, which hands the place to the waitlist.
+    def has_add_permission(self, request):
+        return False
+
+    def delete_model(self, request, obj):
+        try:
+            leave_tournament(obj.user, obj.tournament)
+        except LedgerError:
+            pass  # already left
+
+    def delete_queryset(self, request, queryset):
+        for participant in queryset.select_related('user', 'tournament'):
+            self.delete_model(request, participant)
+
+@admin.register(TournamentWaitlistEntry)
+class TournamentWaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'tournament', 'created_at']
+    search_fields = ['user__username', 'tournament__title']
 
 @admin.register(Reward)
 class RewardAdmin(admin.ModelAdmin):
@@ -47,3 +89,16 @@ class UserActivityAdmin(admin.ModelAdmin):
     list_filter = ['activity_type', 'status', 'created_at']
     search_fields = ['user__username', 'description']
     date_hierarchy = 'created_at'
+
+@admin.register(ArchivedActivity)
+class ArchivedActivityAdmin(admin.ModelAdmin):
+    list_display = ['user', 'activity_type', 'points_change', 'status', 'created_at']
+    list_filter = ['activity_type', 'status']
+    search_fields = ['user__username']
+
+@admin.register(UserActivityDaily)
+class UserActivityDailyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'day', 'activity_type', 'activity_count', 'points_change']
+    list_filter = ['activity_type']
+    search_fields = ['user__username']
+    date_hierarchy = 'day'
@@ -0,0 +1,71 @@
+"""
+Async counterpart of DRF's ``@api_view``.
+
+DRF dispatches synchronously, so under ASGI a plain ``@api_view`` holds a
+worker thread for the whole request. ``@async_api_view`` runs the same
+policy checks (authentication, permissions, throttles, content negotiation
+and exception handling) on the event loop and awaits the view, so the only
+threads a request touches are the ones Django's async ORM hands its queries
+to. Use it with the usual ``@permission_classes`` / ``@throttle_classes``
+decorators underneath.
+"""
+from asgiref.sync import iscoroutinefunction
+from rest_framework.views import APIView
+
+
+async def resolve_user(request):
+    """Load ``request.user`` without blocking, so sync code can read it from the event loop afterwards."""
+    if hasattr(request, 'auser'):
+        request.user = await request.auser()
+    return request.user
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        # SessionAuthentication reads the Django request's user synchronously.
+        await resolve_user(request)
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            # http_method_not_allowed is DRF's and stays sync; it raises rather than returns.
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+
+def async_api_view(http_method_names):
+    """Turn an ``async def`` function view into an AsyncAPIView, as ``@api_view`` does for sync views."""
+    def decorator(func):
+        assert iscoroutinefunction(func), '@async_api_view needs an async def view'
+
+        async def handler(self, *args, **kwargs):
+            return await func(*args, **kwargs)
+
+        attrs = {
+            '__doc__': func.__doc__,
+            '__module__': func.__module__,
+            'http_method_names': [method.lower() for method in {*http_method_names, 'options'}],
+        }
+        for method in http_method_names:
+            attrs[method.lower()] = handler
+        for policy in ('renderer_classes', 'parser_classes', 'authentication_classes',
+                       'throttle_classes', 'permission_classes'):
+            attrs[policy] = getattr(func, policy, getattr(APIView, policy))
+
+        return type(func.__name__, (AsyncAPIView,), attrs).as_view()
+    return decorator
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .hashing import hash_password, verify_password
+from .models import UserProfile
+
+
+def _user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+def invalidate_cached_users(user_ids):
+    keys = [_user_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user together with their profile in one query
+    and keeps the pair in the cache for ``USER_CACHE_SECONDS``.
+
+    Password checks run on the hashing pool, and a correct password stored
+    under an outdated hasher or work factor is rehashed with the preferred one.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway so response time does not reveal which usernames exist.
+            hash_password(password)
+            return None
+        is_correct, must_update = verify_password(password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+        return user
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User.objects.select_related('profile').get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, timeout=getattr(settings, 'USER_CACHE_SECONDS', 30))
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk if sender is User else instance.user_id)
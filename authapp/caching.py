@@ -0,0 +1,148 @@
+import threading
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import Tournament, TournamentParticipant, Reward, UserReward, Game
+
+_counters = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_counters_lock = threading.Lock()
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def _version_key(namespace):
+    return f'response-cache:{namespace}:version'
+
+
+def _modified_key(namespace):
+    return f'response-cache:{namespace}:modified'
+
+
+def get_version(namespace):
+    """
+    Current version token of ``namespace``.
+
+    Tokens are random rather than counted, so a version lost to eviction or a
+    restart never comes back to make old keys and ETags valid again.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(_version_key(namespace), version, timeout=None)
+        version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def get_last_modified(namespace):
+    """When ``namespace`` last changed, as far as this cache has seen."""
+    modified = cache.get(_modified_key(namespace))
+    if modified is None:
+        cache.add(_modified_key(namespace), timezone.now(), timeout=None)
+        modified = cache.get(_modified_key(namespace), timezone.now())
+    return modified
+
+
+def bump_version(namespace):
+    """Orphan every cached response in ``namespace`` by moving to a new version."""
+    cache.set(_version_key(namespace), uuid.uuid4().hex, timeout=None)
+    cache.set(_modified_key(namespace), timezone.now(), timeout=None)
+
+
+def invalidate(namespace):
+    """Bump ``namespace`` once the current transaction commits, so readers never re-cache stale rows."""
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+def user_namespace(user_id):
+    """Namespace of one user's own rows (their entries and claims), for per-user validators."""
+    return f'user:{user_id}'
+
+
+def _record(namespace, outcome):
+    with _counters_lock:
+        _counters[namespace][outcome] += 1
+
+
+def cache_stats():
+    with _counters_lock:
+        return {namespace: dict(counts) for namespace, counts in _counters.items()}
+
+
+def reset_cache_stats():
+    with _counters_lock:
+        _counters.clear()
+
+
+def _lookup(namespace, request):
+    key = f'response-cache:{namespace}:{get_version(namespace)}:{request.build_absolute_uri()}'
+    cached = cache.get(key)
+    _record(namespace, 'misses' if cached is None else 'hits')
+    return key, cached
+
+
+def _store(key, response):
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=_timeout())
+    return response
+
+
+def cached_response(namespace):
+    """
+    Cache successful GET responses of a DRF function view under ``namespace``.
+
+    Apply below ``@api_view`` (or ``@async_api_view``) so the wrapped function
+    receives the DRF request. Entries are keyed by the namespace version, so
+    invalidation is a single counter bump rather than a key scan.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await view(request, *args, **kwargs)
+                key, cached = _lookup(namespace, request)
+                if cached is not None:
+                    return Response(cached)
+                return _store(key, await view(request, *args, **kwargs))
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            key, cached = _lookup(namespace, request)
+            if cached is not None:
+                return Response(cached)
+            return _store(key, view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+@receiver([post_save, post_delete], sender=Tournament)
+def invalidate_tournaments(sender, **kwargs):
+    invalidate('tournaments')
+
+@receiver([post_save, post_delete], sender=Reward)
+def invalidate_rewards(sender, **kwargs):
+    invalidate('rewards')
+
+@receiver([post_save, post_delete], sender=Game)
+def invalidate_games(sender, **kwargs):
+    invalidate('games')
+
+@receiver([post_save, post_delete], sender=TournamentParticipant)
+@receiver([post_save, post_delete], sender=UserReward)
+def invalidate_owner(sender, instance, **kwargs):
+    invalidate(user_namespace(instance.user_id))
@@ -0,0 +1,120 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .async_views import resolve_user
+from .caching import get_version, get_last_modified, user_namespace
+from .models import UserStats
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def catalog_etag(namespace):
+    def etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        return _etag(namespace, get_version(namespace), request.get_full_path())
+    return etag_func
+
+
+def catalog_last_modified(namespace):
+    def last_modified_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        return get_last_modified(namespace)
+    return last_modified_func
+
+
+def _dashboard_query(request):
+    return UserStats.objects.select_related('user__profile').filter(user=request.user)
+
+
+def _set_dashboard_state(request, stats):
+    state = None
+    if stats is not None:
+        profile = stats.user.profile
+        # Status changes to the user's own entries and claims move none of the columns above.
+        own = user_namespace(request.user.pk)
+        modified = max(filter(None, [stats.last_activity_at, profile.updated_at, get_last_modified(own)]))
+        etag = _etag(
+            'dashboard', request.user.pk, stats.tournament_count, stats.reward_count,
+            stats.last_activity_at, profile.updated_at, profile.points,
+            get_version('tournaments'), get_version('rewards'), get_version(own),
+        )
+        state = (etag, modified)
+    request._dashboard_state = state
+
+
+def _dashboard_state(request):
+    # Both validator functions need the same rows; load them once per request.
+    if not hasattr(request, '_dashboard_state'):
+        stats = _dashboard_query(request).first() if request.user.is_authenticated else None
+        _set_dashboard_state(request, stats)
+    return request._dashboard_state
+
+
+async def aload_dashboard_state(request):
+    """Load the dashboard validators' rows with the async ORM, ahead of the sync validator calls."""
+    stats = await _dashboard_query(request).afirst() if request.user.is_authenticated else None
+    _set_dashboard_state(request, stats)
+
+
+def dashboard_etag(request, *args, **kwargs):
+    state = _dashboard_state(request)
+    return state[0] if state else None
+
+
+def dashboard_last_modified(request, *args, **kwargs):
+    state = _dashboard_state(request)
+    return state[1] if state else None
+
+
+def conditional_get(etag_func, last_modified_func, aprepare=None):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view runs.
+
+    Apply above ``@api_view`` or ``@async_api_view``. Responses are marked
+    ``private, no-cache`` so browsers always revalidate rather than reuse a
+    heuristically fresh copy. The validators themselves are sync; on async
+    views, ``aprepare(request)`` is awaited first to load whatever they read
+    from the database.
+
+    The validators read namespace versions from the cache, so they are only
+    sent while ``CONDITIONAL_GET`` is on: a process-local cache never hears of
+    writes made by the other processes and would answer 304 with stale data.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if settings.CONDITIONAL_GET:
+                    await resolve_user(request)
+                    if aprepare is not None:
+                        await aprepare(request)
+                    response = await conditional_view(request, *args, **kwargs)
+                else:
+                    response = await view(request, *args, **kwargs)
+                if request.method in ('GET', 'HEAD'):
+                    patch_cache_control(response, private=True, no_cache=True)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.CONDITIONAL_GET:
+                response = conditional_view(request, *args, **kwargs)
+            else:
+                response = view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
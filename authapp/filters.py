@@ -0,0 +1,155 @@
+"""
+Declarative filtering and sorting for the catalog list views.
+
+Each catalog lists the query parameters it accepts and the composite indexes
+that can serve them. A request is only run if one index covers it: its
+equality filters must be that index's leading columns, and any range filter
+and the sort must both fall on the next column. Anything else is rejected
+with a 400 before a query is issued, so no parameter combination can turn
+into a table scan.
+"""
+from collections import namedtuple
+
+from rest_framework.exceptions import ValidationError
+
+from .dates import parse_bound
+from .models import Tournament, Game
+
+FilteredList = namedtuple('FilteredList', 'queryset ordering_field descending paginate')
+
+
+class Exact:
+    def __init__(self, field, choices=None):
+        self.field = field
+        self.choices = {value for value, _ in choices} if choices else None
+
+    def parse(self, value):
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"must be one of {', '.join(sorted(self.choices))}")
+        return value
+
+    def lookup(self):
+        return self.field
+
+
+class Range:
+    def __init__(self, field, operator, parser):
+        self.field = field
+        self.operator = operator
+        self.parser = parser
+
+    def parse(self, value):
+        return self.parser(value)
+
+    def lookup(self):
+        return f'{self.field}__{self.operator}'
+
+
+def _datetime(value):
+    parsed = parse_bound(value)
+    if parsed is None:
+        raise ValueError('must be an ISO date or datetime')
+    return parsed
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('must be an integer')
+
+
+class CatalogFilter:
+    sort_query_param = 'sort'
+
+    def __init__(self, filters, sorts, indexes, default_sort):
+        self.filters = filters
+        self.sorts = sorts
+        self.indexes = indexes
+        self.default_sort = default_sort
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.sort_query_param in params or any(name in params for name in self.filters)
+
+    def _parse_sort(self, request, ranged):
+        sort = request.query_params.get(self.sort_query_param)
+        if sort is None:
+            # A lone range filter sorts on its own column, which an index can serve.
+            sort = f'-{next(iter(ranged))}' if len(ranged) == 1 else self.default_sort
+        field = sort.lstrip('-')
+        if field not in self.sorts:
+            raise ValidationError({self.sort_query_param: [
+                f"Unsupported sort; use one of {', '.join(sorted(self.sorts))}, optionally prefixed with '-'"
+            ]})
+        return field, sort.startswith('-')
+
+    def _covering_index(self, equal, ranged, sort_field):
+        for columns in self.indexes:
+            leading, following = columns[:len(equal)], set(columns[len(equal):len(equal) + 1])
+            if set(leading) == equal and ranged | {sort_field} <= following:
+                return columns
+        return None
+
+    def apply(self, request, queryset):
+        """Validate the request's filters and sort and push them into ``queryset``."""
+        lookups, equal, ranged = {}, set(), set()
+        for name, spec in self.filters.items():
+            value = request.query_params.get(name)
+            if value is None or value == '':
+                continue
+            try:
+                lookups[spec.lookup()] = spec.parse(value)
+            except ValueError as e:
+                raise ValidationError({name: [str(e)]})
+            (ranged if isinstance(spec, Range) else equal).add(spec.field)
+
+        sort_field, descending = self._parse_sort(request, ranged)
+        if self._covering_index(equal, ranged, sort_field) is None:
+            raise ValidationError({'filters': [
+                'No index supports this combination of filters and sort; supported: ' + '; '.join(
+                    ' + '.join(columns) for columns in self.indexes
+                )
+            ]})
+        return FilteredList(queryset.filter(**lookups), sort_field, descending, self.is_requested(request))
+
+
+TOURNAMENT_FILTERS = CatalogFilter(
+    filters={
+        'status': Exact('status', Tournament.STATUS_CHOICES),
+        'game': Exact('game'),
+        'start_after': Range('start_date', 'gte', _datetime),
+        'start_before': Range('start_date', 'lt', _datetime),
+        'created_after': Range('created_at', 'gte', _datetime),
+        'created_before': Range('created_at', 'lt', _datetime),
+    },
+    sorts={'created_at', 'start_date'},
+    indexes=[
+        ('created_at',), ('status', 'created_at'), ('game', 'created_at'),
+        ('start_date',), ('status', 'start_date'),
+    ],
+    default_sort='-created_at',
+)
+
+GAME_FILTERS = CatalogFilter(
+    filters={
+        'status': Exact('status', Game.STATUS_CHOICES),
+        'genre': Exact('genre'),
+        'created_after': Range('created_at', 'gte', _datetime),
+        'created_before': Range('created_at', 'lt', _datetime),
+    },
+    sorts={'created_at'},
+    indexes=[('created_at',), ('status', 'created_at'), ('genre', 'created_at')],
+    default_sort='-created_at',
+)
+
+REWARD_FILTERS = CatalogFilter(
+    filters={
+        'category': Exact('category'),
+        'min_points': Range('points', 'gte', _integer),
+        'max_points': Range('points', 'lte', _integer),
+    },
+    sorts={'created_at', 'points'},
+    indexes=[('created_at',), ('category', 'created_at'), ('points',), ('category', 'points')],
+    default_sort='-created_at',
+)
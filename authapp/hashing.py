@@ -0,0 +1,79 @@
+"""
+Password hashing off the request thread.
+
+Hashes run on a small, bounded thread pool (scrypt, PBKDF2 and argon2-cffi
+release the GIL), so a login storm can keep at most ``LOGIN_HASH_WORKERS``
+cores busy. Callers beyond the pool plus its ``LOGIN_HASH_QUEUE_SIZE`` queue
+are turned away with ``HashingBusy`` instead of piling up behind it.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Scrypt with parameters from settings; changing them rehashes on next login."""
+
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with parameters from settings; needs the ``argon2-cffi`` package."""
+
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.LOGIN_HASH_WORKERS,
+                settings.LOGIN_HASH_QUEUE_SIZE,
+                settings.LOGIN_HASH_TIMEOUT,
+            )
+        return _pool
+
+
+def hash_password(password):
+    return get_pool().run(hashers.make_password, password)
+
+
+def verify_password(password, encoded):
+    """Return ``(is_correct, must_update)`` for ``password`` against ``encoded``."""
+    return get_pool().run(hashers.verify_password, password, encoded)
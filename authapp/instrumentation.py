@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+from .caching import cache_stats
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    @property
+    def duplicate_queries(self):
+        # Same statement shape run more than once is the signature of an N+1.
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+
+def _timed_representation(to_representation):
+    @wraps(to_representation)
+    def wrapper(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return to_representation(self, instance)
+        # Nested serializers run inside their parent; only the outermost call is timed.
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if metrics.serializer_depth == 0:
+                metrics.serializer_time += time.perf_counter() - start
+    wrapper._timed = True
+    return wrapper
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _add_query_recorder(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        # First, so a temporary execute_wrapper() block popping its own wrapper leaves this one alone.
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def install_query_recording():
+    """
+    Count every connection's queries against the current request's metrics.
+
+    Async views run their queries on executor threads with their own
+    connections, so the recorder sits on every connection as it opens and
+    finds the request through the context variable, which follows the request
+    across threads.
+    """
+    connection_created.connect(_add_query_recorder, dispatch_uid='authapp.instrumentation.queries')
+    for alias in connections:
+        _add_query_recorder(connection=connections[alias])
+
+
+def install_serializer_timing():
+    # Imported here: fast_serializers compiles its serializers against the app's models at import.
+    from .fast_serializers import FastSerializer
+
+    for cls in (serializers.Serializer, serializers.ListSerializer, FastSerializer):
+        if not getattr(cls.to_representation, '_timed', False):
+            cls.to_representation = _timed_representation(cls.to_representation)
+
+
+class MetricsRegistry:
+    """Per-view running totals, kept in-process and dumped in Prometheus text format."""
+
+    FIELDS = ('requests', 'duration', 'queries', 'sql_duration', 'duplicate_queries', 'serializer_duration')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def record(self, view, duration, metrics):
+        with self._lock:
+            totals = self._views[view]
+            totals['requests'] += 1
+            totals['duration'] += duration
+            totals['queries'] += metrics.queries
+            totals['sql_duration'] += metrics.sql_time
+            totals['duplicate_queries'] += metrics.duplicate_queries
+            totals['serializer_duration'] += metrics.serializer_time
+
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(totals) for view, totals in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render_prometheus(self):
+        metrics = [
+            ('requests', 'api_requests_total', 'counter', 'Requests handled'),
+            ('duration', 'api_request_duration_seconds_total', 'counter', 'Wall time spent in the view stack'),
+            ('queries', 'api_sql_queries_total', 'counter', 'SQL statements executed'),
+            ('sql_duration', 'api_sql_duration_seconds_total', 'counter', 'Time spent executing SQL'),
+            ('duplicate_queries', 'api_sql_duplicate_queries_total', 'counter',
+             'Statements repeated within one request'),
+            ('serializer_duration', 'api_serializer_duration_seconds_total', 'counter',
+             'Time spent in serializers, DRF and fast path'),
+        ]
+        snapshot = self.snapshot()
+        lines = []
+        for field, name, kind, help_text in metrics:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for view, totals in sorted(snapshot.items()):
+                lines.append(f'{name}{{view="{view}"}} {totals[field]:.6g}')
+        for outcome in ('hits', 'misses'):
+            name = f'api_response_cache_{outcome}_total'
+            lines.append(f'# TYPE {name} counter')
+            for namespace, counts in sorted(cache_stats().items()):
+                lines.append(f'{name}{{namespace="{namespace}"}} {counts[outcome]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def _is_staff(user):
+    return user is not None and user.is_staff
+
+
+class PerformanceMiddleware:
+    """
+    Time each request, its SQL and its serializers.
+
+    Totals go into ``registry`` for the staff-only metrics endpoint, and out as
+    a ``Server-Timing`` header to staff (or anyone when ``DEBUG`` is on), since
+    they tell clients how much SQL each request runs.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True)
+        if self.enabled:
+            install_query_recording()
+            install_serializer_timing()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+        return self._finish(request, response, metrics, duration, settings.DEBUG or _is_staff(getattr(request, 'user', None)))
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+        # The lazy request.user would hit the database synchronously on the event loop.
+        show = settings.DEBUG or (hasattr(request, 'auser') and _is_staff(await request.auser()))
+        return self._finish(request, response, metrics, duration, show)
+
+    def _finish(self, request, response, metrics, duration, show_timing):
+        registry.record(_view_name(request), duration, metrics)
+        if not show_timing:
+            return response
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={duration * 1000:.2f}',
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'dup;desc="{metrics.duplicate_queries} duplicate queries"',
+            f'serialize;dur={metrics.serializer_time * 1000:.2f}',
+        ])
+        return response
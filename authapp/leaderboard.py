@@ -0,0 +1,122 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from .models import UserProfile
+
+
+class Leaderboard:
+    """
+    In-process ranking of users by points.
+
+    Entries are kept in a list sorted by ``(-points, user_id)``, so rank lookups
+    are a binary search. The ledger pushes each balance change in after commit;
+    a periodic full reload from the ``points`` index picks up changes made by
+    other processes or by the admin. One thread reloads at a time; while it
+    does, the others keep reading the previous snapshot.
+    """
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._entries = []
+        self._points = {}
+        self._usernames = {}
+        self._loaded_at = None
+
+    def _refresh_interval(self):
+        if self.refresh_interval is not None:
+            return self.refresh_interval
+        return getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 60)
+
+    def load(self):
+        rows = UserProfile.objects.order_by('-points', 'user_id').values_list(
+            'user_id', 'user__username', 'points'
+        )
+        entries, points, usernames = [], {}, {}
+        for user_id, username, user_points in rows.iterator(chunk_size=5000):
+            entries.append((-user_points, user_id))
+            points[user_id] = user_points
+            usernames[user_id] = username
+        with self._lock:
+            self._entries, self._points, self._usernames = entries, points, usernames
+            self._loaded_at = time.monotonic()
+
+    def _stale(self):
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self._refresh_interval()
+
+    def _ensure_loaded(self):
+        if not self._stale():
+            return
+        # Without a usable snapshot, wait for the reload in progress; with one, serve it meanwhile.
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._load_lock.release()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def set_points(self, user_id, points, username=None):
+        with self._lock:
+            old = self._points.get(user_id)
+            if old is not None:
+                index = bisect_left(self._entries, (-old, user_id))
+                del self._entries[index]
+            insort(self._entries, (-points, user_id))
+            self._points[user_id] = points
+            if username is not None:
+                self._usernames[user_id] = username
+
+    def refresh_user(self, user_id):
+        """Re-read one user's balance from the database and re-rank them."""
+        row = UserProfile.objects.filter(user_id=user_id).values_list('points', 'user__username').first()
+        if row is None:
+            return
+        if self._loaded_at is not None:
+            self.set_points(user_id, *row)
+
+    def _row(self, index):
+        negative_points, user_id = self._entries[index]
+        return {
+            'rank': bisect_left(self._entries, (negative_points,)) + 1,
+            'user_id': user_id,
+            'username': self._usernames.get(user_id),
+            'points': -negative_points,
+        }
+
+    def top(self, limit):
+        self._ensure_loaded()
+        with self._lock:
+            return [self._row(i) for i in range(min(limit, len(self._entries)))]
+
+    def rank(self, user_id):
+        """Competition rank: one more than the number of users with strictly more points."""
+        self._ensure_loaded()
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return bisect_left(self._entries, (-points,)) + 1
+
+    def around(self, user_id, radius):
+        self._ensure_loaded()
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return []
+            index = bisect_left(self._entries, (-points, user_id))
+            start = max(0, index - radius)
+            end = min(len(self._entries), index + radius + 1)
+            return [self._row(i) for i in range(start, end)]
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authapp.retention import archive_activity
+
+
+class Command(BaseCommand):
+    help = 'Roll up and archive UserActivity rows older than the retention horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ACTIVITY_RETENTION_DAYS,
+                            help='Keep this many days of activity in the hot table')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows moved per transaction')
+        parser.add_argument('--destination', choices=['table', 'file'], default='table',
+                            help='Archive into ArchivedActivity or into gzip files per month and batch')
+        parser.add_argument('--archive-dir', default=settings.ACTIVITY_ARCHIVE_DIR,
+                            help='Directory for --destination file')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = archive_activity(
+            cutoff,
+            batch_size=options['batch_size'],
+            destination=options['destination'],
+            archive_dir=options['archive_dir'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} activities older than {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from authapp.models import (
+    Tournament, TournamentParticipant,
+    Reward, UserReward, Game, UserActivity
+)
+from authapp.serializers import (
+    TournamentSerializer, TournamentParticipantSerializer,
+    UserRewardSerializer, GameSerializer, UserActivitySerializer
+)
+
+# EXPLAIN QUERY PLAN fragments that mean the query does not scale with table size.
+FULL_SCAN_PREFIX = 'SCAN '
+TEMP_SORT_MARKER = 'USE TEMP B-TREE'
+
+
+def view_queries(user_id=0):
+    """The querysets each view issues, in both default and keyset-paginated ordering."""
+    tournaments = TournamentSerializer.setup_eager_loading(Tournament.objects.all())
+    participations = TournamentParticipantSerializer.setup_eager_loading(
+        TournamentParticipant.objects.filter(user_id=user_id)
+    )
+    rewards = Reward.objects.filter(is_active=True)
+    user_rewards = UserRewardSerializer.setup_eager_loading(
+        UserReward.objects.filter(user_id=user_id)
+    )
+    games = GameSerializer.setup_eager_loading(Game.objects.all())
+    activities = UserActivitySerializer.setup_eager_loading(
+        UserActivity.objects.filter(user_id=user_id)
+    )
+
+    return [
+        ('tournament_list', tournaments),
+        ('tournament_list (paginated)', tournaments.order_by('-created_at', '-pk')[:21]),
+        ('tournament_list (status)', tournaments.filter(status='upcoming')),
+        ('user_tournaments', participations),
+        ('user_tournaments (paginated)', participations.order_by('-joined_at', '-pk')[:21]),
+        ('reward_list', rewards),
+        ('reward_list (paginated)', rewards.order_by('-created_at', '-pk')[:21]),
+        ('reward_list (category)', Reward.objects.filter(category='Gaming Gear')),
+        ('user_rewards', user_rewards),
+        ('user_rewards (paginated)', user_rewards.order_by('-claimed_at', '-pk')[:21]),
+        ('game_list', games),
+        ('game_list (paginated)', games.order_by('-created_at', '-pk')[:21]),
+        ('game_list (status)', games.filter(status='pending')),
+        ('game_list (genre)', games.filter(genre='MOBA')),
+        ('tournament_list (game)', tournaments.filter(game='FIFA 24').order_by('-created_at', '-pk')[:21]),
+        ('tournament_list (start range)', tournaments.filter(start_date__gte=timezone.now())
+            .order_by('start_date', 'pk')[:21]),
+        ('tournament_list (status, start)', tournaments.filter(status='upcoming')
+            .order_by('-start_date', '-pk')[:21]),
+        ('reward_list (points range)', rewards.filter(points__gte=100, points__lte=500)
+            .order_by('points', 'pk')[:21]),
+        ('reward_list (category, points)', rewards.filter(category='Gaming Gear')
+            .order_by('-points', '-pk')[:21]),
+        ('game_list (genre, created range)', games.filter(genre='MOBA', created_at__gte=timezone.now())
+            .order_by('-created_at', '-pk')[:21]),
+        ('dashboard_data (activity)', activities[:20]),
+        ('archive_activity', UserActivity.objects.filter(created_at__lt=timezone.now())
+            .order_by('created_at', 'pk')[:5000]),
+    ]
+
+
+def plan_problems(plan):
+    problems = []
+    for line in plan.splitlines():
+        detail = line.split('|', 1)[-1].strip().lstrip('-').strip()
+        if detail.startswith(FULL_SCAN_PREFIX) and 'INDEX' not in detail:
+            problems.append(f'full scan: {detail}')
+        if TEMP_SORT_MARKER in detail:
+            problems.append(f'temp sort: {detail}')
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN QUERY PLAN on every view query and fail on full scans or temp B-tree sorts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('explain_queries only understands SQLite query plans')
+
+        failures = 0
+        for label, queryset in view_queries():
+            plan = queryset.explain()
+            problems = plan_problems(plan)
+            if options['verbose_plans']:
+                self.stdout.write(f'{label}:\n{plan}\n')
+            if problems:
+                failures += 1
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR(f'{label}: {problem}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{label}: ok'))
+
+        if failures:
+            raise CommandError(f'{failures} view queries need an index')
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authapp.dates import parse_bound
+from authapp.exports import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream activities, participants or reward claims to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--output', choices=sorted(FORMATS), default='csv', help='Row encoding')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument('--start', help='Only rows on or after this ISO date or datetime')
+        parser.add_argument('--end', help='Only rows before this ISO date or datetime')
+        parser.add_argument('--since', type=int, help='Only rows with an id above this one')
+        parser.add_argument('--file', default='-', help="Destination path, or '-' for stdout")
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched and encoded per chunk')
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_bound(options['start'])
+            end = parse_bound(options['end'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = stream_export(
+            options['kind'], options['output'], options['gzip'],
+            start=start, end=end, since=options['since'], chunk_size=options['chunk_size'],
+        )
+        if options['file'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options['file'], 'wb') as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['file']}"))
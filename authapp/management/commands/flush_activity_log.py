@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from authapp.activity_log import get_writer
+
+
+class Command(BaseCommand):
+    help = 'Replay activity journals left behind by stopped server processes'
+
+    def handle(self, *args, **options):
+        replayed = get_writer().recover()
+        self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} buffered activity events'))
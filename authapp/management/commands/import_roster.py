@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authapp.models import Tournament
+from authapp.services import LedgerError, register_roster
+
+
+class Command(BaseCommand):
+    help = 'Register a roster of users, one per line, for a tournament'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_id', type=int)
+        parser.add_argument('roster', help="File with one user per line, or '-' for stdin")
+        parser.add_argument('--field', choices=['username', 'id'], default='username',
+                            help='Whether roster lines are usernames or user ids')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per query and insert')
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options['tournament_id'])
+        except Tournament.DoesNotExist:
+            raise CommandError(f"Tournament {options['tournament_id']} does not exist")
+
+        if options['roster'] == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(options['roster'], encoding='utf-8') as roster:
+                lines = roster.read().splitlines()
+        entries = [line.strip() for line in lines if line.strip()]
+        if options['field'] == 'id':
+            try:
+                entries = [int(entry) for entry in entries]
+            except ValueError as e:
+                raise CommandError(f'Roster contains a non-numeric id: {e}')
+
+        try:
+            result = register_roster(
+                tournament,
+                user_ids=entries if options['field'] == 'id' else (),
+                usernames=entries if options['field'] == 'username' else (),
+                batch_size=options['batch_size'],
+            )
+        except LedgerError as e:
+            raise CommandError(str(e))
+
+        for entry in result['unknown']:
+            self.stderr.write(f'Unknown or inactive user: {entry}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Registered {result['registered']} users for {tournament.title}; "
+            f"{len(result['already_registered'])} already registered, {len(result['unknown'])} unknown"
+        ))
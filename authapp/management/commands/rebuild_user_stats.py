@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from authapp.services import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute every UserStats row from participations, claims and activity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per bulk upsert')
+
+    def handle(self, *args, **options):
+        written = rebuild_user_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {written} users'))
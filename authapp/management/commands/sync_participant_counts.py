@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from authapp.models import Tournament
+from authapp.services import sync_participant_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute every Tournament.participant_count from its participant rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', nargs='*', type=int, help='Only these tournaments')
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.all()
+        if options['tournament_ids']:
+            tournaments = tournaments.filter(pk__in=options['tournament_ids'])
+        updated = sync_participant_counts(tournaments)
+        self.stdout.write(self.style.SUCCESS(f'Synced participant counts for {updated} tournaments'))
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0004_profile_points_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedActivity',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tournament_id', models.BigIntegerField(blank=True, null=True)),
+                ('reward_id', models.BigIntegerField(blank=True, null=True)),
+                ('activity_type', models.CharField(choices=[('registration', 'Registration'), ('login', 'Login'), ('tournament_join', 'Tournament Join'), ('tournament_leave', 'Tournament Leave'), ('reward_claim', 'Reward Claim'), ('points_earned', 'Points Earned'), ('profile_update', 'Profile Update')], max_length=30)),
+                ('description', models.TextField()),
+                ('points_change', models.IntegerField(default=0)),
+                ('status', models.CharField(default='completed', max_length=50)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Archived activities',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserActivityDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('activity_type', models.CharField(choices=[('registration', 'Registration'), ('login', 'Login'), ('tournament_join', 'Tournament Join'), ('tournament_leave', 'Tournament Leave'), ('reward_claim', 'Reward Claim'), ('points_earned', 'Points Earned'), ('profile_update', 'Profile Update')], max_length=30)),
+                ('activity_count', models.IntegerField(default=0)),
+                ('points_change', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'User daily activity',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['created_at'], name='activity_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedactivity',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_activities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='useractivitydaily',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedactivity',
+            index=models.Index(fields=['user', 'created_at'], name='archived_user_created_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='useractivitydaily',
+            unique_together={('user', 'day', 'activity_type')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_participant_counts(apps, schema_editor):
+    Tournament = apps.get_model('authapp', 'Tournament')
+    TournamentParticipant = apps.get_model('authapp', 'TournamentParticipant')
+    counts = TournamentParticipant.objects.filter(tournament=OuterRef('pk')).order_by().values(
+        'tournament'
+    ).annotate(n=Count('pk')).values('n')
+    Tournament.objects.update(participant_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0005_activity_retention'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='participant_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_participant_counts, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TournamentWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='authapp.tournament')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tournament_waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Tournament waitlist entries',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['tournament', 'created_at', 'id'], name='waitlist_order_idx')],
+                'unique_together': {('user', 'tournament')},
+            },
+        ),
+    ]
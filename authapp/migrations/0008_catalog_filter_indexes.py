@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0007_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reward',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['points'], name='reward_active_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reward',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'points'], name='reward_category_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['game', 'created_at'], name='tournament_game_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['start_date'], name='tournament_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+        ),
+    ]
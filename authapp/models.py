@@ -21,15 +21,34 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['points'], name='profile_points_idx'),
+        ]
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
+        UserStats.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
+class UserStats(models.Model):
+    """Per-user dashboard counters, maintained by authapp.services alongside the rows they count."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats')
+    tournament_count = models.IntegerField(default=0)
+    reward_count = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.user.username} - stats"
+
+    class Meta:
+        verbose_name_plural = 'User stats'
+
 class Tournament(models.Model):
     STATUS_CHOICES = [
         ('upcoming', 'Upcoming'),
@@ -45,6 +64,8 @@ class Tournament(models.Model):
     end_date = models.DateTimeField()
     prize_pool = models.CharField(max_length=100, blank=True, null=True)
     max_participants = models.IntegerField(default=100)
+    # Maintained by the join/leave services so capacity checks are one conditional UPDATE.
+    participant_count = models.IntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='upcoming')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tournaments')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -54,6 +75,13 @@ class Tournament(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='tournament_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='tournament_status_idx'),
+            models.Index(fields=['game', 'created_at'], name='tournament_game_idx'),
+            models.Index(fields=['start_date'], name='tournament_start_idx'),
+            models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+        ]
 
 class TournamentParticipant(models.Model):
     STATUS_CHOICES = [
@@ -71,10 +99,29 @@ class TournamentParticipant(models.Model):
     class Meta:
         unique_together = ('user', 'tournament')
         ordering = ['-joined_at']
+        indexes = [
+            models.Index(fields=['user', 'joined_at'], name='participant_user_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.tournament.title}"
 
+class TournamentWaitlistEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tournament_waitlist_entries')
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='waitlist')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'tournament')
+        ordering = ['created_at', 'id']
+        verbose_name_plural = 'Tournament waitlist entries'
+        indexes = [
+            models.Index(fields=['tournament', 'created_at', 'id'], name='waitlist_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} waiting for {self.tournament.title}"
+
 class Reward(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -90,6 +137,14 @@ class Reward(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # SQLite compiles is_active=True to a bare column test, which only a partial index can use.
+            models.Index(fields=['created_at'], condition=models.Q(is_active=True), name='reward_active_idx'),
+            models.Index(fields=['category', 'created_at'], name='reward_category_idx'),
+            models.Index(fields=['points'], condition=models.Q(is_active=True), name='reward_active_points_idx'),
+            models.Index(fields=['category', 'points'], condition=models.Q(is_active=True),
+                         name='reward_category_points_idx'),
+        ]
 
 class UserReward(models.Model):
     STATUS_CHOICES = [
@@ -108,6 +163,9 @@ class UserReward(models.Model):
 
     class Meta:
         ordering = ['-claimed_at']
+        indexes = [
+            models.Index(fields=['user', 'claimed_at'], name='userreward_user_claimed_idx'),
+        ]
 
 class Game(models.Model):
     STATUS_CHOICES = [
@@ -132,6 +190,11 @@ class Game(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='game_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='game_status_idx'),
+            models.Index(fields=['genre', 'created_at'], name='game_genre_idx'),
+        ]
 
 class UserActivity(models.Model):
     ACTIVITY_TYPE_CHOICES = [
@@ -159,3 +222,45 @@ class UserActivity(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'User activities'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
+
+class ArchivedActivity(models.Model):
+    """UserActivity rows past the retention horizon, keeping their original ids."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_activities')
+    tournament_id = models.BigIntegerField(blank=True, null=True)
+    reward_id = models.BigIntegerField(blank=True, null=True)
+    activity_type = models.CharField(max_length=30, choices=UserActivity.ACTIVITY_TYPE_CHOICES)
+    description = models.TextField()
+    points_change = models.IntegerField(default=0)
+    status = models.CharField(max_length=50, default='completed')
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user.username} - {self.activity_type}"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'Archived activities'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='archived_user_created_idx'),
+        ]
+
+class UserActivityDaily(models.Model):
+    """Per-user, per-day totals of activity that has been rolled out of UserActivity."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    day = models.DateField()
+    activity_type = models.CharField(max_length=30, choices=UserActivity.ACTIVITY_TYPE_CHOICES)
+    activity_count = models.IntegerField(default=0)
+    points_change = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.day} - {self.activity_type}"
+
+    class Meta:
+        unique_together = ('user', 'day', 'activity_type')
+        ordering = ['-day']
+        verbose_name_plural = 'User daily activity'
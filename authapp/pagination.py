@@ -0,0 +1,159 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .fast_serializers import fast_serializer
+
+
+def _cursor_position(row):
+    return row[-2:]
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over an (ordering field, id) pair, newest or largest first by default.
+
+    Pagination is opt-in: requests without ``cursor`` or ``page_size`` get the
+    plain list response existing clients expect.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering_field, descending=True):
+        self.ordering_field = ordering_field
+        self.descending = descending
+        self.limit = None
+        self.next_position = None
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, position):
+        value, pk = position
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps({'t': value, 'i': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = field.to_python(payload['t'])
+            pk = int(payload['i'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def page_queryset(self, queryset, request):
+        """The query for the requested page, with one extra row to tell whether another follows."""
+        self.request = request
+        field = self.ordering_field
+        direction, after = ('-', 'lt') if self.descending else ('', 'gt')
+        queryset = queryset.order_by(f'{direction}{field}', f'{direction}pk')
+
+        position = self.decode_cursor(request, queryset.model._meta.get_field(field))
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'pk__{after}': pk})
+            )
+        self.limit = self.get_page_size(request)
+        return queryset[:self.limit + 1]
+
+    def trim_page(self, rows, position=None):
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            self.next_position = position(last) if position else (getattr(last, self.ordering_field), last.pk)
+        return rows
+
+    def paginate_queryset(self, queryset, request):
+        return self.trim_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.trim_page([obj async for obj in self.page_queryset(queryset, request)])
+
+    def _page_rows(self, fast, queryset, request):
+        # The cursor's (value, pk) pair rides along at the end of each row.
+        return fast.rows(self.page_queryset(queryset, request), self.ordering_field, 'pk')
+
+    def paginate_rows(self, fast, queryset, request):
+        """A page as the rows of the fast serializer ``fast``."""
+        return self.trim_page(list(self._page_rows(fast, queryset, request)), _cursor_position)
+
+    async def apaginate_rows(self, fast, queryset, request):
+        return self.trim_page([row async for row in self._page_rows(fast, queryset, request)], _cursor_position)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+def paginated_response(request, queryset, serializer_class, ordering_field, descending=True, paginate=False):
+    """
+    Serialize ``queryset`` as a keyset page when requested, otherwise as a plain list.
+
+    ``paginate`` forces a page even without pagination parameters, for
+    callers such as filtered listings that must never ship a whole table.
+    Serializers with a fast path are built from row tuples instead of model
+    instances.
+    """
+    paginator = KeysetPagination(ordering_field, descending)
+    fast = fast_serializer(serializer_class)
+    if not (paginate or paginator.is_requested(request)):
+        return Response(fast.serialize(queryset) if fast else serializer_class(queryset, many=True).data)
+    if fast:
+        return paginator.get_paginated_response(
+            fast.to_representation(paginator.paginate_rows(fast, queryset, request))
+        )
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+
+async def apaginated_response(request, queryset, serializer_class, ordering_field, descending=True,
+                              paginate=False):
+    """``paginated_response`` for async views: rows are fetched with the async ORM, then serialized."""
+    paginator = KeysetPagination(ordering_field, descending)
+    fast = fast_serializer(serializer_class)
+    if not (paginate or paginator.is_requested(request)):
+        if fast:
+            return Response(await fast.aserialize(queryset))
+        return Response(serializer_class([obj async for obj in queryset], many=True).data)
+    if fast:
+        return paginator.get_paginated_response(
+            fast.to_representation(await paginator.apaginate_rows(fast, queryset, request))
+        )
+    page = await paginator.apaginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
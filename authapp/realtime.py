@@ -0,0 +1,179 @@
+"""
+Push updates to browsers over Server-Sent Events.
+
+Services publish small events after their transaction commits; the
+``event_stream`` view holds one async connection per client and forwards the
+topics it subscribed to. Fan-out is in-process: each message is encoded once
+and handed to every subscriber's bounded queue, so an idle client costs an
+open connection and nothing else. Set ``REALTIME_BROKER_URL`` to a Redis URL
+(needs the redis package) to relay events between processes.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_TOPICS = ('tournaments', 'rewards')
+
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+
+def encode_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+
+class Subscription:
+    def __init__(self, loop, topics, queue_size):
+        self.loop = loop
+        self.topics = topics
+        self.queue = asyncio.Queue(queue_size)
+
+    def offer(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # the client's event loop is gone; unsubscribe is on its way
+
+    def _put(self, message):
+        if self.queue.full():
+            # A slow client loses its oldest update rather than holding up publishers.
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class Broker:
+    """Topic-based pub/sub between publishing threads and subscribers' event loops."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.relay = None
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, topics):
+        subscription = Subscription(asyncio.get_running_loop(), tuple(topics), self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].discard(subscription)
+                if not self._subscribers[topic]:
+                    del self._subscribers[topic]
+
+    def wants(self, topic):
+        """Whether publishing to ``topic`` can reach anyone, so callers can skip building the event."""
+        return self.relay is not None or topic in self._subscribers
+
+    def publish(self, topic, event, data):
+        message = encode_event(event, data)
+        if self.relay is not None:
+            # The relay echoes back to every process, this one included.
+            self.relay.publish(topic, message)
+        else:
+            self.deliver(topic, message)
+
+    def deliver(self, topic, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.offer(message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+
+class RedisRelay:
+    """Carry events between processes through one Redis pub/sub channel."""
+
+    channel = 'authapp-realtime'
+    reconnect_seconds = 1.0
+
+    def __init__(self, url, broker):
+        import redis
+
+        self.broker = broker
+        self._client = redis.Redis.from_url(url)
+        self._thread = threading.Thread(target=self._listen, name='realtime-relay', daemon=True)
+        self._thread.start()
+
+    def publish(self, topic, message):
+        # Events are best-effort; a Redis outage must not fail the write that triggered them.
+        try:
+            self._client.publish(self.channel, json.dumps([topic, message.decode()]))
+        except Exception:
+            logger.exception('Dropping realtime event for %s: relay publish failed', topic)
+
+    def _listen(self):
+        while True:
+            try:
+                self._relay_messages()
+            except Exception:
+                logger.exception('Realtime relay lost its Redis connection; reconnecting')
+            time.sleep(self.reconnect_seconds)
+
+    def _relay_messages(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for item in pubsub.listen():
+            try:
+                topic, message = json.loads(item['data'])
+            except (TypeError, ValueError):
+                logger.warning('Ignoring malformed realtime relay message')
+                continue
+            self.broker.deliver(topic, message.encode())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(queue_size=settings.REALTIME_QUEUE_SIZE)
+            if settings.REALTIME_BROKER_URL:
+                _broker.relay = RedisRelay(settings.REALTIME_BROKER_URL, _broker)
+        return _broker
+
+
+def publish_after_commit(topic, event, load):
+    """
+    On commit, publish ``event`` to ``topic`` with the payload ``load()`` returns.
+
+    ``load`` usually re-reads the changed row, so it is skipped when nobody
+    is listening; a ``None`` payload publishes nothing.
+    """
+    from django.db import transaction
+
+    def send():
+        broker = get_broker()
+        if broker.wants(topic):
+            data = load()
+            if data is not None:
+                broker.publish(topic, event, data)
+
+    transaction.on_commit(send, robust=True)
+
+
+async def event_messages(subscription, heartbeat):
+    """Yield a subscription's messages, with a comment line whenever it has been quiet for ``heartbeat`` seconds."""
+    yield b'retry: 5000\n\n'
+    while True:
+        try:
+            yield await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+        except asyncio.TimeoutError:
+            yield b': keep-alive\n\n'
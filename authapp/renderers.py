@@ -0,0 +1,32 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; without it rendering falls back to the standard library
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The bytes match ``JSONRenderer`` with the default compact, unicode and
+    strict settings for data made of dicts, lists, strings, integers,
+    booleans, None, dates and times. orjson formats floats (and so decimals
+    the encoder turns into floats) differently, so only use it on views whose
+    payloads carry none; the fast serializers never produce them. Anything
+    orjson rejects is rendered by ``JSONRenderer``.
+    """
+    _options = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not (self.compact and self.strict) or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=self._options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Match JSONRenderer, which escapes the two characters that are invalid in JavaScript strings.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
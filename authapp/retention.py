@@ -0,0 +1,145 @@
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UserActivity, ArchivedActivity, UserActivityDaily
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'tournament_id', 'reward_id', 'activity_type',
+    'description', 'points_change', 'status', 'created_at'
+)
+
+
+def _roll_up(rows):
+    totals = defaultdict(lambda: [0, 0])
+    for row in rows:
+        key = (row['user_id'], timezone.localdate(row['created_at']), row['activity_type'])
+        totals[key][0] += 1
+        totals[key][1] += row['points_change']
+
+    for (user_id, day, activity_type), (count, points) in totals.items():
+        updated = UserActivityDaily.objects.filter(
+            user_id=user_id, day=day, activity_type=activity_type
+        ).update(activity_count=F('activity_count') + count, points_change=F('points_change') + points)
+        if not updated:
+            UserActivityDaily.objects.create(
+                user_id=user_id, day=day, activity_type=activity_type,
+                activity_count=count, points_change=points
+            )
+
+
+def _archive_to_table(rows):
+    ArchivedActivity.objects.bulk_create(
+        [ArchivedActivity(**row) for row in rows], ignore_conflicts=True
+    )
+
+
+def _pending(path):
+    return path.with_name(f'.{path.name}.pending')
+
+
+def _write_pending_files(rows, archive_dir):
+    """
+    Write a batch to hidden pending files, one per month, and return their final paths.
+
+    Files are named by month and by the batch's first and last id, so a batch
+    archived again after a failed run replaces its own file rather than
+    duplicating rows.
+    """
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[row['created_at'].strftime('%Y-%m')].append(row)
+    paths = []
+    for month, month_rows in by_month.items():
+        ids = [row['id'] for row in month_rows]
+        path = archive_dir / f'activity-{month}.{min(ids)}-{max(ids)}.jsonl.gz'
+        with open(_pending(path), 'wb') as raw:
+            with gzip.open(raw, 'wt', encoding='utf-8') as archive:
+                for row in month_rows:
+                    archive.write(json.dumps({**row, 'created_at': row['created_at'].isoformat()}) + '\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.append(path)
+    return paths
+
+
+def _publish(paths):
+    for path in paths:
+        os.replace(_pending(path), path)
+
+
+def _discard(paths):
+    for path in paths:
+        _pending(path).unlink(missing_ok=True)
+
+
+def recover_pending_files(archive_dir):
+    """
+    Settle pending files left by a run that stopped between its commit and publishing.
+
+    A file whose rows are gone from UserActivity belongs to a committed batch
+    and is published; one whose rows remain (or that is unreadable) belongs
+    to a batch that never committed and is dropped.
+    """
+    for pending in Path(archive_dir).glob('.activity-*.pending'):
+        try:
+            with gzip.open(pending, 'rt', encoding='utf-8') as archive:
+                ids = [json.loads(line)['id'] for line in archive]
+        except (OSError, EOFError, ValueError):
+            ids = None
+        path = pending.with_name(pending.name[1:-len('.pending')])
+        if ids and not UserActivity.objects.filter(pk__in=ids).exists():
+            os.replace(pending, path)
+        else:
+            logger.warning('Dropping unpublished activity archive %s', path.name)
+            pending.unlink()
+
+
+def archive_activity(cutoff, batch_size=5000, destination='table', archive_dir=None):
+    """
+    Move UserActivity rows created before ``cutoff`` out of the hot table.
+
+    Each batch of at most ``batch_size`` rows is rolled up into
+    UserActivityDaily, copied to the archive table or to gzip files, then
+    deleted, all in one transaction. Files are written aside first and only
+    published once that transaction commits. Returns the number of rows moved.
+    """
+    if destination not in ('table', 'file'):
+        raise ValueError(f'Unknown archive destination: {destination}')
+    if destination == 'file':
+        archive_dir = Path(archive_dir)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        recover_pending_files(archive_dir)
+
+    moved = 0
+    while True:
+        paths = []
+        try:
+            with transaction.atomic():
+                rows = list(
+                    UserActivity.objects.filter(created_at__lt=cutoff)
+                    .order_by('created_at', 'pk')
+                    .values(*ARCHIVE_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    return moved
+                _roll_up(rows)
+                if destination == 'table':
+                    _archive_to_table(rows)
+                else:
+                    paths = _write_pending_files(rows, archive_dir)
+                    transaction.on_commit(lambda paths=paths: _publish(paths))
+                UserActivity.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        except Exception:
+            _discard(paths)
+            raise
+        moved += len(rows)
@@ -0,0 +1,236 @@
+"""
+Full-text search over tournaments, games and rewards.
+
+Documents live in one ``authapp_search`` table outside the ORM: an FTS5
+virtual table on SQLite, or a table with a generated ``tsvector`` column and
+a GIN index on Postgres. Each document's row id encodes its type and primary
+key, so signal handlers replace a single document by key as objects are saved
+or deleted. Bulk loads that bypass signals are caught up with the
+``rebuild_search_index`` command.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db import connections, router, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Tournament, Game, Reward
+
+TABLE = 'authapp_search'
+MAX_RESULTS = 100
+
+# type -> (row id code, model name, facet name)
+DOCUMENT_TYPES = {
+    'tournament': (1, 'Tournament', 'game'),
+    'game': (2, 'Game', 'genre'),
+    'reward': (3, 'Reward', 'category'),
+}
+TYPE_CODES = len(DOCUMENT_TYPES) + 1
+
+# kind, status and facet are indexed so filters narrow the MATCH itself instead of
+# being checked row by row; the rank function gives them no weight.
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        title, body, kind, status, facet, object_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0, 0.0, 0.0)')",
+]
+
+POSTGRES_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+        rowid bigint PRIMARY KEY,
+        title text NOT NULL,
+        body text NOT NULL,
+        kind varchar(16) NOT NULL,
+        object_id bigint NOT NULL,
+        status varchar(20) NOT NULL,
+        facet varchar(100) NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+        ) STORED
+    )""",
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING gin (document)',
+]
+
+
+def _rowid(kind, object_id):
+    return object_id * TYPE_CODES + DOCUMENT_TYPES[kind][0]
+
+
+def _text(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def tournament_document(obj):
+    return obj.title, _text(obj.game, obj.description), obj.status, obj.game
+
+
+def game_document(obj):
+    return obj.title, _text(obj.developer, obj.genre, obj.description), obj.status, obj.genre
+
+
+def reward_document(obj):
+    return obj.title, _text(obj.category, obj.description), 'active', obj.category
+
+
+DOCUMENT_BUILDERS = {
+    'tournament': tournament_document,
+    'game': game_document,
+    'reward': reward_document,
+}
+
+
+def _searchable(kind, obj):
+    # Inactive rewards are hidden from the catalog, so they stay out of search too.
+    return kind != 'reward' or obj.is_active
+
+
+def create_index(connection):
+    statements = POSTGRES_DDL if connection.vendor == 'postgresql' else SQLITE_DDL
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def _write(cursor, connection, rows, replace=True):
+    """Write documents given as (rowid, title, body, kind, object_id, status, facet) tuples."""
+    insert = f"""INSERT INTO {TABLE} (rowid, title, body, kind, object_id, status, facet)
+                 VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+    if connection.vendor == 'postgresql':
+        insert += """ ON CONFLICT (rowid) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body,
+                      status = EXCLUDED.status, facet = EXCLUDED.facet"""
+    elif replace:
+        # FTS5 has no upsert; deleting by rowid is a primary-key lookup.
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+    cursor.executemany(insert, rows)
+
+
+def _document_row(kind, obj):
+    title, body, status, facet = DOCUMENT_BUILDERS[kind](obj)
+    return _rowid(kind, obj.pk), title, body, kind, obj.pk, status, facet
+
+
+def index_object(kind, obj):
+    connection = connections[router.db_for_write(type(obj))]
+    with connection.cursor() as cursor:
+        if _searchable(kind, obj):
+            _write(cursor, connection, [_document_row(kind, obj)])
+        else:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, obj.pk)])
+
+
+def remove_object(kind, obj):
+    connection = connections[router.db_for_write(type(obj))]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, obj.pk)])
+
+
+def rebuild_index(using='default', apps=global_apps, batch_size=2000):
+    """Reindex every document from the source tables. Returns the number of documents written."""
+    connection = connections[using]
+    written = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for kind, (_, model_name, _) in DOCUMENT_TYPES.items():
+            model = apps.get_model('authapp', model_name)
+            rows = []
+            for obj in model._default_manager.using(using).order_by('pk').iterator(chunk_size=batch_size):
+                if not _searchable(kind, obj):
+                    continue
+                rows.append(_document_row(kind, obj))
+                if len(rows) == batch_size:
+                    _write(cursor, connection, rows, replace=False)
+                    written += len(rows)
+                    rows = []
+            if rows:
+                _write(cursor, connection, rows, replace=False)
+                written += len(rows)
+    return written
+
+
+def _terms(query):
+    # Tokens of one character would expand to most of the vocabulary as prefixes.
+    return [(term, len(term) > 1) for term in re.findall(r'\w+', query.lower())]
+
+
+def _phrase(value):
+    return '"' + ' '.join(re.findall(r'\w+', value.lower())) + '"'
+
+
+def search(query, types=None, status=None, facets=None, limit=20):
+    """
+    Ranked documents matching every word of ``query``, words of two or more letters as prefixes.
+
+    ``facets`` maps a facet name (``game``, ``genre``, ``category``) to the
+    required value and limits results to the types that have that facet.
+    Returns dicts with ``type``, ``id``, ``title``, ``status`` and the type's
+    facet.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    types = list(types or DOCUMENT_TYPES)
+    for facet in (facets or {}):
+        types = [kind for kind in types if DOCUMENT_TYPES[kind][2] == facet]
+    if not types:
+        return []
+
+    connection = connections[router.db_for_read(Tournament)]
+    if connection.vendor == 'postgresql':
+        expression = ' & '.join(f'{term}:*' if prefix else term for term, prefix in terms)
+        where = ["document @@ to_tsquery('simple', %s)", f"kind IN ({', '.join(['%s'] * len(types))})"]
+        params = [expression, *types]
+        if status:
+            where.append('status = %s')
+            params.append(status)
+        rank = "ts_rank(document, to_tsquery('simple', %s)) DESC"
+        rank_params = [expression]
+    else:
+        words = ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+        expression = f'{{title body}} : ({words})'
+        if len(types) < len(DOCUMENT_TYPES):
+            expression += f" AND kind : ({' OR '.join(types)})"
+        if status:
+            expression += f' AND status : {_phrase(status)}'
+        expression += ''.join(f' AND facet : {_phrase(value)}' for value in (facets or {}).values())
+        where = [f'{TABLE} MATCH %s']
+        params = [expression]
+        rank, rank_params = 'rank', []
+    # The index matches facet words; the exact value is checked on the few rows left.
+    for value in (facets or {}).values():
+        where.append('facet = %s')
+        params.append(value)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT kind, object_id, title, status, facet FROM {TABLE}
+                WHERE {' AND '.join(where)} ORDER BY {rank} LIMIT %s""",
+            [*params, *rank_params, min(limit, MAX_RESULTS)]
+        )
+        return [
+            {'type': kind, 'id': int(object_id), 'title': title, 'status': status,
+             DOCUMENT_TYPES[kind][2]: facet}
+            for kind, object_id, title, status, facet in cursor.fetchall()
+        ]
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Reward)
+def index_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(sender.__name__.lower(), instance)
+
+
+@receiver(post_delete, sender=Tournament)
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Reward)
+def remove_deleted(sender, instance, **kwargs):
+    remove_object(sender.__name__.lower(), instance)
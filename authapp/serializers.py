@@ -5,6 +5,8 @@ from .models import (
     UserProfile, Tournament, TournamentParticipant,
     Reward, UserReward, Game, UserActivity
 )
+from .hashing import hash_password
+from .services import log_activity
 
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,6 +26,10 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'name', 'email', 'first_name', 'last_name', 'role', 'avatar', 'points', 'created_at', 'updated_at']
         read_only_fields = ['id', 'username']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('profile')
+
     def get_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip() or obj.username
 
@@ -42,19 +48,15 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email', ''),
-            password=validated_data['password'],
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email', '')),
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
         )
-        UserActivity.objects.create(
-            user=user,
-            activity_type='registration',
-            description=f"User {user.username} registered",
-            points_change=0
-        )
+        user.password = hash_password(validated_data['password'])
+        user.save()
+        log_activity(user, 'registration', f"User {user.username} registered")
         return user
 
 class LoginSerializer(serializers.Serializer):
@@ -67,14 +69,35 @@ class LoginSerializer(serializers.Serializer):
             return user
         raise serializers.ValidationError("Invalid credentials.")
 
+ROSTER_MAX_SIZE = 10000
+
+class RosterSerializer(serializers.Serializer):
+    userIds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=ROSTER_MAX_SIZE
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150), required=False, max_length=ROSTER_MAX_SIZE
+    )
+
+    def validate(self, data):
+        if not (data.get('userIds') or data.get('usernames')):
+            raise serializers.ValidationError("Provide userIds or usernames.")
+        if len(data.get('userIds', [])) + len(data.get('usernames', [])) > ROSTER_MAX_SIZE:
+            raise serializers.ValidationError(f"A roster is limited to {ROSTER_MAX_SIZE} entries.")
+        return data
+
 class TournamentSerializer(serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Tournament
         fields = ['id', 'title', 'game', 'description', 'start_date', 'end_date',
-                  'prize_pool', 'max_participants', 'status', 'created_by', 'created_at']
-        read_only_fields = ['id', 'created_by', 'created_at']
+                  'prize_pool', 'max_participants', 'participant_count', 'status', 'created_by', 'created_at']
+        read_only_fields = ['id', 'participant_count', 'created_by', 'created_at']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('created_by')
 
 class TournamentParticipantSerializer(serializers.ModelSerializer):
     tournament = TournamentSerializer(read_only=True)
@@ -84,6 +107,10 @@ class TournamentParticipantSerializer(serializers.ModelSerializer):
         fields = ['id', 'user_id', 'tournament_id', 'tournament', 'status', 'joined_at']
         read_only_fields = ['id', 'user_id', 'joined_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('tournament__created_by')
+
 class RewardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reward
@@ -99,6 +126,10 @@ class UserRewardSerializer(serializers.ModelSerializer):
         fields = ['id', 'user_id', 'reward_id', 'reward', 'status', 'claimed_at']
         read_only_fields = ['id', 'user_id', 'claimed_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('reward')
+
 class GameSerializer(serializers.ModelSerializer):
     submitted_by = serializers.StringRelatedField(read_only=True)
 
@@ -108,6 +139,10 @@ class GameSerializer(serializers.ModelSerializer):
                   'status', 'image_url', 'submitted_by', 'created_at']
         read_only_fields = ['id', 'submitted_by', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('submitted_by')
+
 class UserActivitySerializer(serializers.ModelSerializer):
     tournament = serializers.SerializerMethodField()
     reward = serializers.SerializerMethodField()
@@ -118,6 +153,14 @@ class UserActivitySerializer(serializers.ModelSerializer):
                   'description', 'points_change', 'status', 'created_at', 'tournament', 'reward']
         read_only_fields = ['id', 'user_id', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('tournament', 'reward').only(
+            'id', 'user_id', 'tournament_id', 'reward_id', 'activity_type',
+            'description', 'points_change', 'status', 'created_at',
+            'tournament__title', 'reward__title'
+        )
+
     def get_tournament(self, obj):
         if obj.tournament:
             return {'title': obj.tournament.title}
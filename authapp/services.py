@@ -0,0 +1,421 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .activity_log import get_writer, is_buffered
+from .backends import invalidate_cached_user, invalidate_cached_users
+from .caching import invalidate
+from .leaderboard import leaderboard
+from .realtime import get_broker, publish_after_commit, user_topic
+from .models import (
+    UserProfile, UserStats, Tournament, TournamentParticipant, TournamentWaitlistEntry,
+    Reward, UserReward, UserActivity
+)
+
+TOURNAMENT_JOIN_POINTS = 10
+GAME_SUBMISSION_POINTS = 25
+
+
+class LedgerError(Exception):
+    """A points or stock operation was rejected; the message is safe to return to clients."""
+
+
+def _update_stats(user, last_activity_at, tournaments=0, rewards=0):
+    updates = {'last_activity_at': last_activity_at}
+    if tournaments:
+        updates['tournament_count'] = F('tournament_count') + tournaments
+    if rewards:
+        updates['reward_count'] = F('reward_count') + rewards
+    if not UserStats.objects.filter(user=user).update(**updates):
+        rebuild_user_stats(User.objects.filter(pk=user.pk))
+
+
+def _publish_points(user_ids, batch_size=1000):
+    broker = get_broker()
+    listening = [pk for pk in user_ids if broker.wants(user_topic(pk))]
+    for chunk in _chunks(listening, batch_size):
+        for pk, points in UserProfile.objects.filter(user_id__in=chunk).values_list('user_id', 'points'):
+            broker.publish(user_topic(pk), 'user.points', {'points': points})
+
+
+def _points_changed(user):
+    user_id = user.pk
+    transaction.on_commit(lambda: leaderboard.refresh_user(user_id))
+    transaction.on_commit(lambda: _publish_points([user_id]), robust=True)
+    # F() updates skip post_save, so drop the cached user/profile pair here.
+    invalidate_cached_user(user_id)
+
+
+def _participants_changed(tournament):
+    # The counter UPDATE bypasses post_save, so invalidate explicitly.
+    invalidate('tournaments')
+    publish_after_commit(
+        'tournaments', 'tournament.participants',
+        lambda: Tournament.objects.filter(pk=tournament.pk).values(
+            'id', 'participant_count', 'max_participants'
+        ).first()
+    )
+
+
+def log_activity(user, activity_type, description, points_change=0, tournament=None, reward=None,
+                 tournaments=0, rewards=0):
+    """
+    Write a UserActivity row and fold it, plus any count deltas, into the user's stats.
+
+    Bookkeeping events with no points or count effect may be handed to the
+    buffered writer instead, in which case nothing is returned.
+    """
+    if not (tournaments or rewards) and is_buffered(activity_type, points_change):
+        get_writer().submit(
+            user_id=user.pk,
+            tournament_id=tournament.pk if tournament else None,
+            reward_id=reward.pk if reward else None,
+            activity_type=activity_type,
+            description=description,
+            points_change=points_change
+        )
+        return None
+    activity = UserActivity.objects.create(
+        user=user,
+        tournament=tournament,
+        reward=reward,
+        activity_type=activity_type,
+        description=description,
+        points_change=points_change
+    )
+    _update_stats(user, activity.created_at, tournaments=tournaments, rewards=rewards)
+    return activity
+
+
+def credit_points(user, amount, activity_type, description, tournament=None, reward=None, **deltas):
+    """Add ``amount`` to the user's balance and log it, in one transaction."""
+    with transaction.atomic():
+        UserProfile.objects.filter(user=user).update(points=F('points') + amount)
+        _points_changed(user)
+        return log_activity(user, activity_type, description, amount, tournament, reward, **deltas)
+
+
+def _take_seats(tournament, seats=1):
+    """Reserve ``seats`` places in one conditional UPDATE, so concurrent joins cannot overbook."""
+    return Tournament.objects.filter(
+        pk=tournament.pk, participant_count__lte=F('max_participants') - seats
+    ).update(participant_count=F('participant_count') + seats)
+
+
+def _release_seat(tournament):
+    Tournament.objects.filter(pk=tournament.pk).update(
+        participant_count=Greatest(F('participant_count') - 1, 0)
+    )
+
+
+def join_tournament(user, tournament):
+    """
+    Seat ``user`` in ``tournament``, or put them on its waitlist when it is full.
+
+    Returns the TournamentParticipant, or the TournamentWaitlistEntry when no
+    place was free.
+    """
+    with transaction.atomic():
+        if not _take_seats(tournament):
+            if TournamentParticipant.objects.filter(user=user, tournament=tournament).exists():
+                raise LedgerError('Already joined this tournament')
+            try:
+                with transaction.atomic():
+                    return TournamentWaitlistEntry.objects.create(user=user, tournament=tournament)
+            except IntegrityError:
+                raise LedgerError('Already on the waitlist for this tournament')
+        try:
+            # Savepoint so a duplicate join leaves the outer transaction usable.
+            with transaction.atomic():
+                participant = TournamentParticipant.objects.create(user=user, tournament=tournament)
+        except IntegrityError:
+            # Raising rolls back the outer transaction, seat reservation included.
+            raise LedgerError('Already joined this tournament')
+        credit_points(
+            user, TOURNAMENT_JOIN_POINTS, 'tournament_join',
+            f"Joined tournament: {tournament.title}", tournament=tournament, tournaments=1
+        )
+        _participants_changed(tournament)
+    return participant
+
+
+def waitlist_position(entry):
+    """1-based place of ``entry`` in its tournament's waitlist."""
+    return TournamentWaitlistEntry.objects.filter(tournament_id=entry.tournament_id).filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, pk__lte=entry.pk)
+    ).count()
+
+
+def _promote_next(tournament):
+    """Give a freed place to the longest-waiting user; returns the new participant, or None."""
+    while True:
+        entry = TournamentWaitlistEntry.objects.select_related('user').filter(tournament=tournament).first()
+        if entry is None:
+            return None
+        deleted, _ = TournamentWaitlistEntry.objects.filter(pk=entry.pk).delete()
+        if not deleted:
+            continue  # promoted by a concurrent leave
+        try:
+            with transaction.atomic():
+                participant = TournamentParticipant.objects.create(user=entry.user, tournament=tournament)
+        except IntegrityError:
+            continue  # seated directly while waiting
+        credit_points(
+            entry.user, TOURNAMENT_JOIN_POINTS, 'tournament_join',
+            f"Promoted from waitlist: {tournament.title}", tournament=tournament, tournaments=1
+        )
+        return participant
+
+
+def leave_tournament(user, tournament):
+    """
+    Withdraw ``user`` from ``tournament``, or from its waitlist.
+
+    A freed place goes straight to the head of the waitlist, so the
+    participant count only drops when nobody is waiting.
+    """
+    with transaction.atomic():
+        deleted, _ = TournamentParticipant.objects.filter(user=user, tournament=tournament).delete()
+        if not deleted:
+            if TournamentWaitlistEntry.objects.filter(user=user, tournament=tournament).delete()[0]:
+                return
+            raise LedgerError('Not enrolled in this tournament')
+        UserProfile.objects.filter(user=user).update(
+            points=Greatest(F('points') - TOURNAMENT_JOIN_POINTS, 0)
+        )
+        _points_changed(user)
+        log_activity(
+            user, 'tournament_leave', f"Left tournament: {tournament.title}",
+            -TOURNAMENT_JOIN_POINTS, tournament=tournament, tournaments=-1
+        )
+        _free_seat(tournament)
+
+
+def _free_seat(tournament):
+    if _promote_next(tournament) is None:
+        _release_seat(tournament)
+    _participants_changed(tournament)
+
+
+def _seat_vacated(tournament_id):
+    with transaction.atomic():
+        tournament = Tournament.objects.filter(pk=tournament_id).first()
+        if tournament is not None:
+            _free_seat(tournament)
+
+
+@receiver(post_delete, sender=TournamentParticipant)
+def _participant_deleted(sender, instance, origin=None, **kwargs):
+    # leave_tournament frees the seat itself and a deleted tournament has no counter left; this
+    # covers cascades from elsewhere, e.g. deleting the user. Deferred to commit so the user's
+    # own waitlist entries are gone before the head of the waitlist is promoted.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (TournamentParticipant, Tournament):
+        return
+    tournament_id = instance.tournament_id
+    transaction.on_commit(lambda: _seat_vacated(tournament_id))
+
+
+def promote_waitlist(tournament):
+    """Fill any free places from the waitlist, e.g. after ``max_participants`` is raised."""
+    promoted = 0
+    with transaction.atomic():
+        while _take_seats(tournament):
+            if _promote_next(tournament) is None:
+                _release_seat(tournament)
+                break
+            promoted += 1
+        _participants_changed(tournament)
+    return promoted
+
+
+def sync_participant_counts(tournaments=None):
+    """Recompute ``Tournament.participant_count`` from the participant rows, e.g. after bulk loads."""
+    tournaments = tournaments if tournaments is not None else Tournament.objects.all()
+    updated = tournaments.update(participant_count=_count_of(TournamentParticipant, 'tournament'))
+    invalidate('tournaments')
+    return updated
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _resolve_roster(user_ids, usernames, batch_size):
+    """Map active user ids to the roster entry naming them, in roster order, plus unmatched entries."""
+    resolved, unknown = {}, []
+    for field, values in (('pk', user_ids), ('username', usernames)):
+        values = list(dict.fromkeys(values))
+        found = {}
+        for chunk in _chunks(values, batch_size):
+            found.update(
+                (value, pk) for pk, value in User.objects.filter(
+                    **{f'{field}__in': chunk}, is_active=True
+                ).values_list('pk', field)
+            )
+        for value in values:
+            if value in found:
+                resolved.setdefault(found[value], value)
+            else:
+                unknown.append(value)
+    return resolved, unknown
+
+
+def register_roster(tournament, user_ids=(), usernames=(), batch_size=1000):
+    """
+    Register a whole roster for ``tournament`` in one transaction.
+
+    The roster is resolved and checked against existing registrations with
+    set-based queries, its places are reserved against ``max_participants``
+    in one conditional UPDATE, then it is written with ``bulk_create`` and a
+    single points update per batch. A roster that does not fit is rejected
+    whole. Returns a summary with the number registered
+    and the entries that were unknown or already registered.
+    """
+    with transaction.atomic():
+        candidates, unknown = _resolve_roster(user_ids, usernames, batch_size)
+
+        already = set()
+        for chunk in _chunks(list(candidates), batch_size):
+            already.update(TournamentParticipant.objects.filter(
+                tournament=tournament, user_id__in=chunk
+            ).values_list('user_id', flat=True))
+        new = [pk for pk in candidates if pk not in already]
+
+        if new and not _take_seats(tournament, len(new)):
+            tournament.refresh_from_db(fields=['participant_count', 'max_participants'])
+            free = max(tournament.max_participants - tournament.participant_count, 0)
+            raise LedgerError(f'Roster does not fit: {len(new)} new participants, {free} places left')
+
+        now = timezone.now()
+        description = f"Joined tournament: {tournament.title}"
+        try:
+            with transaction.atomic():
+                TournamentParticipant.objects.bulk_create(
+                    [TournamentParticipant(user_id=pk, tournament=tournament) for pk in new],
+                    batch_size=batch_size
+                )
+        except IntegrityError:
+            raise LedgerError('Roster overlaps a registration made while it was being processed')
+        UserActivity.objects.bulk_create(
+            [
+                UserActivity(user_id=pk, tournament=tournament, activity_type='tournament_join',
+                             description=description, points_change=TOURNAMENT_JOIN_POINTS)
+                for pk in new
+            ],
+            batch_size=batch_size
+        )
+        for chunk in _chunks(new, batch_size):
+            TournamentWaitlistEntry.objects.filter(tournament=tournament, user_id__in=chunk).delete()
+            UserProfile.objects.filter(user_id__in=chunk).update(points=F('points') + TOURNAMENT_JOIN_POINTS)
+            updated = UserStats.objects.filter(user_id__in=chunk).update(
+                tournament_count=F('tournament_count') + 1,
+                last_activity_at=Greatest(Coalesce(F('last_activity_at'), now), now)
+            )
+            if updated < len(chunk):
+                rebuild_user_stats(User.objects.filter(pk__in=chunk, stats__isnull=True))
+
+        if new:
+            transaction.on_commit(leaderboard.invalidate)
+            invalidate_cached_users(new)
+            transaction.on_commit(lambda: _publish_points(new), robust=True)
+            _participants_changed(tournament)
+    return {
+        'registered': len(new),
+        'already_registered': [entry for pk, entry in candidates.items() if pk in already],
+        'unknown': unknown,
+    }
+
+
+def claim_reward(user, reward_id):
+    """
+    Take one unit of stock and debit the reward's cost.
+
+    Both updates are conditional, so concurrent claims can neither oversell
+    stock nor overdraw points. Raises ``Reward.DoesNotExist`` for unknown ids.
+    """
+    with transaction.atomic():
+        taken = Reward.objects.filter(pk=reward_id, is_active=True, stock__gt=0).update(
+            stock=F('stock') - 1
+        )
+        reward = Reward.objects.get(pk=reward_id)
+        if not taken:
+            if not reward.is_active:
+                raise LedgerError('Reward is not active')
+            raise LedgerError('Reward is out of stock')
+
+        debited = UserProfile.objects.filter(user=user, points__gte=reward.points).update(
+            points=F('points') - reward.points
+        )
+        if not debited:
+            raise LedgerError('Insufficient points')
+        _points_changed(user)
+
+        user_reward = UserReward.objects.create(user=user, reward=reward)
+        # The stock UPDATE bypasses post_save, so invalidate explicitly.
+        invalidate('rewards')
+        publish_after_commit(
+            'rewards', 'reward.stock',
+            lambda: Reward.objects.filter(pk=reward_id).values('id', 'stock').first()
+        )
+        log_activity(
+            user, 'reward_claim', f"Claimed reward: {reward.title}",
+            -reward.points, reward=reward, rewards=1
+        )
+    return user_reward
+
+
+def submit_game(user, serializer):
+    with transaction.atomic():
+        game = serializer.save(submitted_by=user)
+        credit_points(
+            user, GAME_SUBMISSION_POINTS, 'points_earned', f"Submitted game: {game.title}"
+        )
+    return game
+
+
+def _count_of(model, field='user'):
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('pk'))
+    return Coalesce(Subquery(counts.values('n')), 0)
+
+
+def rebuild_user_stats(users=None, batch_size=1000):
+    """
+    Recompute UserStats from the source tables for ``users`` (default: everyone).
+
+    Works through users in primary-key batches and upserts each batch with a
+    single bulk_create. Returns the number of rows written.
+    """
+    users = (users if users is not None else User.objects.all()).order_by('pk')
+    last_activity = UserActivity.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(
+        at=Max('created_at')
+    )
+    rows = users.annotate(
+        tournament_count=_count_of(TournamentParticipant),
+        reward_count=_count_of(UserReward),
+        last_activity_at=Subquery(last_activity.values('at')),
+    ).values_list('pk', 'tournament_count', 'reward_count', 'last_activity_at')
+
+    written = 0
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return written
+        UserStats.objects.bulk_create(
+            [
+                UserStats(user_id=pk, tournament_count=tournaments, reward_count=rewards,
+                          last_activity_at=last_activity_at)
+                for pk, tournaments, rewards, last_activity_at in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['tournament_count', 'reward_count', 'last_activity_at'],
+        )
+        written += len(batch)
+        last_pk = batch[-1][0]
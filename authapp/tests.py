@@ -1,3 +1,1402 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import importlib.util
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from backend.database import database_config, replica_configs
+from backend.routers import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+
+from .models import (
+    UserProfile, UserStats, Tournament, TournamentParticipant,
+    Reward, UserReward, Game, UserActivity,
+    ArchivedActivity, UserActivityDaily
+)
+from .admin import TournamentAdmin, TournamentParticipantAdmin
+from .activity_log import ActivityWriter, get_writer, spool_dir
+from .caching import cache_stats, reset_cache_stats
+from .hashing import HashingBusy, HashingPool
+from .instrumentation import registry
+from .leaderboard import Leaderboard, leaderboard
+from .realtime import Broker, RedisRelay, encode_event, publish_after_commit
+from .retention import ARCHIVE_FIELDS, _write_pending_files, recover_pending_files
+from .fast_serializers import FAST_SERIALIZERS, Computed, FastSerializer
+from .renderers import FastJSONRenderer
+from .serializers import (
+    GameSerializer, RewardSerializer, TournamentParticipantSerializer, UserActivitySerializer
+)
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .services import (
+    LedgerError, log_activity, join_tournament, leave_tournament, promote_waitlist, claim_reward, submit_game
+)
+
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=NO_CACHE)
+class QueryCountTests(APITestCase):
+    """Every list endpoint must issue the same number of queries regardless of row count."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.host = User.objects.create_user(username='host', password='testpass123')
+        self.seeded = 0
+
+    def seed(self, count):
+        now = timezone.now()
+        for i in range(self.seeded, self.seeded + count):
+            tournament = Tournament.objects.create(
+                title=f'Tournament {i}', game='FIFA 24',
+                start_date=now + timedelta(days=7), end_date=now + timedelta(days=9),
+                created_by=self.host
+            )
+            reward = Reward.objects.create(
+                title=f'Reward {i}', points=100, category='Gaming Gear', stock=10
+            )
+            Game.objects.create(
+                title=f'Game {i}', developer='Studio', genre='MOBA', submitted_by=self.host
+            )
+            TournamentParticipant.objects.create(user=self.user, tournament=tournament)
+            UserReward.objects.create(user=self.user, reward=reward)
+            UserActivity.objects.create(
+                user=self.user, tournament=tournament, activity_type='tournament_join',
+                description=f'Joined tournament: {tournament.title}', points_change=10
+            )
+            UserActivity.objects.create(
+                user=self.user, reward=reward, activity_type='reward_claim',
+                description=f'Claimed reward: {reward.title}', points_change=-100
+            )
+        self.seeded += count
+
+    def count_queries(self, url):
+        # A fresh instance mirrors what session auth hands the view on each request.
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, expected):
+        self.seed(1)
+        small = self.count_queries(url)
+        self.seed(25)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f'{url} query count grows with rows')
+        self.assertEqual(large, expected, f'{url} issued {large} queries, expected {expected}')
+
+    def test_tournament_list(self):
+        self.assertConstantQueries('/api/tournaments/', 1)
+
+    def test_tournament_detail(self):
+        self.seed(1)
+        pk = Tournament.objects.first().pk
+        self.assertEqual(self.count_queries(f'/api/tournaments/{pk}/'), 1)
+
+    def test_game_list(self):
+        self.assertConstantQueries('/api/games/', 1)
+
+    def test_reward_list(self):
+        self.assertConstantQueries('/api/rewards/', 1)
+
+    def test_user_tournaments(self):
+        self.assertConstantQueries('/api/tournaments/user/', 1)
+
+    def test_user_rewards(self):
+        self.assertConstantQueries('/api/rewards/user/', 1)
+
+    def test_dashboard_data(self):
+        # stats, participations, claims, activity, profile
+        self.assertConstantQueries('/api/dashboard/', 5)
+
+
+@override_settings(CACHES=NO_CACHE)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_authenticate(self.user)
+        for i in range(7):
+            Reward.objects.create(title=f'Reward {i}', points=100, category='Gaming Gear', stock=10)
+
+    def test_no_cursor_returns_plain_list(self):
+        response = self.client.get('/api/rewards/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 7)
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        url = '/api/rewards/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Reward.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/rewards/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogFilterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_authenticate(self.user)
+        for i, (category, points) in enumerate([('Gear', 300), ('Gear', 100), ('Gear', 200), ('Skins', 150),
+                                                ('Gear', 250), ('Gear', 900)]):
+            Reward.objects.create(title=f'Reward {i}', points=points, category=category, stock=5)
+        Reward.objects.create(title='Retired', points=220, category='Gear', stock=5, is_active=False)
+        now = timezone.now()
+        for days, status in [(3, 'upcoming'), (1, 'upcoming'), (-2, 'completed'), (5, 'active')]:
+            Tournament.objects.create(
+                title=f'Cup {days}', game='FIFA 24', status=status, created_by=self.user,
+                start_date=now + timedelta(days=days), end_date=now + timedelta(days=days + 1)
+            )
+
+    def test_filters_and_sorts_across_keyset_pages(self):
+        seen = []
+        url = '/api/rewards/?category=Gear&min_points=150&max_points=500&sort=points&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend((row['title'], row['points']) for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [('Reward 2', 200), ('Reward 4', 250), ('Reward 0', 300)])
+
+    def test_filtered_requests_are_always_paginated(self):
+        response = self.client.get('/api/tournaments/', {'status': 'upcoming', 'sort': 'start_date'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.data['results']], ['Cup 1', 'Cup 3'])
+        self.assertIsNone(response.data['next'])
+
+    def test_lone_range_filter_sorts_on_its_column(self):
+        response = self.client.get('/api/tournaments/', {'start_after': timezone.now().date().isoformat()})
+        self.assertEqual([row['title'] for row in response.data['results']], ['Cup 5', 'Cup 3', 'Cup 1'])
+
+    def test_rejects_unindexed_or_invalid_parameters(self):
+        for url, params in [
+            ('/api/tournaments/', {'status': 'upcoming', 'game': 'FIFA 24'}),
+            ('/api/tournaments/', {'game': 'FIFA 24', 'sort': 'start_date'}),
+            ('/api/tournaments/', {'sort': 'title'}),
+            ('/api/tournaments/', {'status': 'postponed'}),
+            ('/api/rewards/', {'category': 'Gear', 'min_points': 'lots'}),
+            ('/api/games/', {'genre': 'MOBA', 'status': 'pending'}),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.reward = Reward.objects.create(title='Gaming Headset', points=100, category='Gaming Gear', stock=2)
+
+    def test_repeat_reads_are_served_from_cache(self):
+        self.client.get('/api/rewards/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/rewards/')
+        self.assertEqual(response.data[0]['stock'], 2)
+        self.assertEqual(cache_stats()['rewards'], {'hits': 1, 'misses': 1})
+
+    def test_save_invalidates_namespace(self):
+        self.client.get('/api/rewards/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reward.title = 'Wireless Headset'
+            self.reward.save()
+        response = self.client.get('/api/rewards/')
+        self.assertEqual(response.data[0]['title'], 'Wireless Headset')
+
+    def test_claim_invalidates_stock(self):
+        UserProfile.objects.filter(user=self.user).update(points=500)
+        self.client.get('/api/rewards/')
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_reward(self.user, self.reward.pk)
+        response = self.client.get('/api/rewards/')
+        self.assertEqual(response.data[0]['stock'], 1)
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_login(self.user)
+        self.reward = Reward.objects.create(title='Gaming Headset', points=100, category='Gaming Gear', stock=2)
+
+    def test_unchanged_catalog_returns_304(self):
+        first = self.client.get('/api/rewards/')
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        second = self.client.get('/api/rewards/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_catalog_change_yields_new_etag(self):
+        first = self.client.get('/api/rewards/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reward.save()
+        second = self.client.get('/api/rewards/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_dashboard_changes_after_ledger_write(self):
+        first = self.client.get('/api/dashboard/')
+        self.assertEqual(self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        tournament = Tournament.objects.create(
+            title='FIFA 24 Championship', game='FIFA 24',
+            start_date=timezone.now(), end_date=timezone.now(), created_by=self.user
+        )
+        join_tournament(self.user, tournament)
+        second = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['stats']['totalTournaments'], 1)
+
+    def test_dashboard_changes_when_own_claim_status_changes(self):
+        claim = UserReward.objects.create(user=self.user, reward=self.reward)
+        first = self.client.get('/api/dashboard/')
+        with self.captureOnCommitCallbacks(execute=True):
+            claim.status = 'delivered'
+            claim.save()
+        second = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['rewards'][0]['status'], 'delivered')
+
+    def test_evicted_version_does_not_revive_old_etags(self):
+        first = self.client.get('/api/rewards/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reward.save()
+        self.client.get('/api/rewards/')
+        cache.clear()
+        second = self.client.get('/api/rewards/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+    @override_settings(CONDITIONAL_GET=False)
+    def test_no_validators_without_a_shared_cache(self):
+        response = self.client.get('/api/rewards/')
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_requests_get_no_validator(self):
+        self.client.logout()
+        response = self.client.get('/api/rewards/', HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, 403)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        leaderboard.invalidate()
+        self.users = {}
+        for username, points in [('ana', 300), ('ben', 500), ('cai', 300), ('dee', 100)]:
+            user = User.objects.create_user(username=username, password='testpass123')
+            UserProfile.objects.filter(user=user).update(points=points)
+            self.users[username] = user
+
+    def test_ranks_share_ties(self):
+        board = Leaderboard()
+        self.assertEqual([row['username'] for row in board.top(4)], ['ben', 'ana', 'cai', 'dee'])
+        self.assertEqual(board.rank(self.users['ben'].pk), 1)
+        self.assertEqual(board.rank(self.users['ana'].pk), 2)
+        self.assertEqual(board.rank(self.users['cai'].pk), 2)
+        self.assertEqual(board.rank(self.users['dee'].pk), 4)
+
+    def test_around_returns_neighbors(self):
+        board = Leaderboard()
+        rows = board.around(self.users['ana'].pk, 1)
+        self.assertEqual([row['username'] for row in rows], ['ben', 'ana', 'cai'])
+
+    def test_ledger_updates_rank_incrementally(self):
+        self.assertEqual(leaderboard.rank(self.users['dee'].pk), 4)
+        tournament = Tournament.objects.create(
+            title='FIFA 24 Championship', game='FIFA 24',
+            start_date=timezone.now(), end_date=timezone.now(), created_by=self.users['ben']
+        )
+        UserProfile.objects.filter(user=self.users['dee']).update(points=495)
+        leaderboard.set_points(self.users['dee'].pk, 495)
+        with self.captureOnCommitCallbacks(execute=True):
+            join_tournament(self.users['dee'], tournament)
+        self.assertEqual(leaderboard.rank(self.users['dee'].pk), 1)
+
+    def test_expired_snapshot_is_reloaded_by_one_thread(self):
+        board = Leaderboard(refresh_interval=60)
+        board.load()
+        board._loaded_at -= 61
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            loading.set()
+            release.wait(5)
+            board._loaded_at = time.monotonic()
+
+        with mock.patch.object(board, 'load', side_effect=slow_load) as load:
+            reloader = threading.Thread(target=board._ensure_loaded)
+            reloader.start()
+            loading.wait(5)
+            # Readers meanwhile get the old snapshot instead of starting loads of their own.
+            self.assertEqual(board.rank(self.users['ben'].pk), 1)
+            release.set()
+            reloader.join()
+            board._ensure_loaded()
+        self.assertEqual(load.call_count, 1)
+
+    def test_my_rank_endpoint(self):
+        self.client.force_authenticate(self.users['cai'])
+        response = self.client.get('/api/leaderboard/me/?radius=1')
+        self.assertEqual(response.data['rank'], 2)
+        self.assertEqual(len(response.data['neighbors']), 3)
+
+
+class ActivityWriterTests(TestCase):
+    def setUp(self):
+        self.spool = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool.cleanup)
+        self.user = User.objects.create_user(username='player', password='testpass123')
+
+    def make_writer(self, **kwargs):
+        writer = ActivityWriter(self.spool.name, flush_interval=3600, **kwargs)
+        self.addCleanup(writer._stopped.set)
+        return writer
+
+    def submit_login(self, writer):
+        writer.submit(user_id=self.user.pk, activity_type='login',
+                      description=f'User {self.user.username} logged in', points_change=0)
+
+    def test_flushes_when_batch_fills(self):
+        writer = self.make_writer(batch_size=3)
+        for _ in range(2):
+            self.submit_login(writer)
+        self.assertEqual(UserActivity.objects.count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit_login(writer)
+            self.assertEqual(UserActivity.objects.count(), 0)
+        self.assertEqual(UserActivity.objects.count(), 3)
+        self.assertEqual(writer.journal_path.read_text(), '')
+        self.assertIsNotNone(UserStats.objects.get(user=self.user).last_activity_at)
+
+    def login_event(self):
+        return json.dumps({'user_id': self.user.pk, 'tournament_id': None, 'reward_id': None,
+                           'activity_type': 'login', 'description': 'User player logged in',
+                           'points_change': 0}) + '\n'
+
+    def test_recovers_journals_of_dead_writers_only(self):
+        alive, dead = self.make_writer(), self.make_writer()
+        for writer in (alive, dead):
+            writer._claim_token()
+            # The crash left half of a second event behind.
+            writer.journal_path.write_text(self.login_event() * 2 + '{"user_id": ')
+        dead._owner_lock.close()
+
+        recovering = self.make_writer()
+        self.assertEqual(recovering.recover(), 2)
+        self.assertEqual(UserActivity.objects.filter(user=self.user, activity_type='login').count(), 2)
+        self.assertTrue(alive.journal_path.exists())
+        self.assertFalse(dead.journal_path.exists())
+        self.assertEqual(self.make_writer().recover(), 0)
+
+    def test_orphan_is_replayed_once_when_writers_recover_together(self):
+        dead = self.make_writer()
+        dead._claim_token()
+        dead.journal_path.write_text(self.login_event())
+        dead._owner_lock.close()
+        first, second = self.make_writer(), self.make_writer()
+        first._claim_token()
+        second._claim_token()
+        for path in Path(self.spool.name).glob('*.lock'):
+            if path.stem == dead.token:
+                first._claim_orphans(path)
+                second._claim_orphans(path)
+        self.assertEqual(second.recover() + first.recover(), 1)
+        self.assertEqual(UserActivity.objects.count(), 1)
+
+    def test_spool_is_per_database(self):
+        with self.settings(ACTIVITY_LOG_SPOOL_DIR=self.spool.name):
+            here = spool_dir()
+            with mock.patch.dict(connection.settings_dict, NAME='/srv/bench.sqlite3'):
+                self.assertNotEqual(spool_dir(), here)
+        self.assertEqual(here.parent, Path(self.spool.name))
+
+    def test_settings_change_replaces_the_writer(self):
+        with self.settings(ACTIVITY_LOG_MODE='buffered', ACTIVITY_LOG_SPOOL_DIR=self.spool.name):
+            writer = get_writer()
+            self.assertEqual(writer.spool_dir, spool_dir())
+        self.assertTrue(writer._stopped.is_set())
+        self.assertIsNot(get_writer(), writer)
+
+    def test_ledger_activity_stays_synchronous(self):
+        with self.settings(ACTIVITY_LOG_MODE='buffered', ACTIVITY_LOG_SPOOL_DIR=self.spool.name):
+            activity = log_activity(self.user, 'points_earned', 'Submitted game: Space Odyssey', 25)
+        self.assertIsNotNone(activity.pk)
+
+
+class ActivityRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        old = timezone.now() - timedelta(days=120)
+        for i in range(5):
+            activity = UserActivity.objects.create(
+                user=self.user, activity_type='points_earned',
+                description=f'Submitted game: Game {i}', points_change=25
+            )
+            UserActivity.objects.filter(pk=activity.pk).update(created_at=old + timedelta(minutes=i))
+        UserActivity.objects.create(user=self.user, activity_type='login', description='User player logged in')
+
+    def test_archives_to_table_in_batches(self):
+        call_command('archive_activity', days=90, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(UserActivity.objects.count(), 1)
+        self.assertEqual(ArchivedActivity.objects.count(), 5)
+        daily = UserActivityDaily.objects.get(user=self.user, activity_type='points_earned')
+        self.assertEqual(daily.activity_count, 5)
+        self.assertEqual(daily.points_change, 125)
+
+    def archive_to_files(self, archive_dir, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_activity', days=90, destination='file',
+                         archive_dir=archive_dir, stdout=StringIO(), **options)
+
+    def read_archive(self, archive_dir):
+        lines = []
+        for path in sorted(Path(archive_dir).iterdir()):
+            with gzip.open(path, 'rt') as archive:
+                lines.extend(json.loads(line) for line in archive)
+        return lines
+
+    def test_archives_to_compressed_files(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            self.archive_to_files(archive_dir, batch_size=2)
+            lines = self.read_archive(archive_dir)
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(ArchivedActivity.objects.count(), 0)
+        self.assertEqual(UserActivity.objects.count(), 1)
+
+    def test_failed_batch_publishes_nothing_and_reruns_cleanly(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            locked = OperationalError('database is locked')
+            with mock.patch('django.db.models.query.QuerySet.delete', side_effect=locked):
+                with self.assertRaises(OperationalError):
+                    self.archive_to_files(archive_dir)
+            self.assertEqual(list(Path(archive_dir).iterdir()), [])
+            self.assertEqual(UserActivity.objects.count(), 6)
+
+            self.archive_to_files(archive_dir)
+            self.assertEqual(len(self.read_archive(archive_dir)), 5)
+
+    def test_settles_files_left_between_commit_and_publish(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            archive_dir = Path(archive_dir)
+            rows = list(UserActivity.objects.filter(activity_type='points_earned').values(*ARCHIVE_FIELDS))
+            committed = _write_pending_files(rows[:3], archive_dir)
+            _write_pending_files(rows[3:], archive_dir)
+            UserActivity.objects.filter(pk__in=[row['id'] for row in rows[:3]]).delete()
+
+            recover_pending_files(archive_dir)
+
+            self.assertEqual(list(archive_dir.iterdir()), committed)
+            self.assertEqual(len(self.read_archive(archive_dir)), 3)
+
+
+@override_settings(CACHES=NO_CACHE)
+class PerformanceMiddlewareTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Reward.objects.create(title='Gaming Mouse', points=300, category='Gaming Gear', stock=5)
+
+    def test_server_timing_header_is_for_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/rewards/'))
+        self.client.force_authenticate(User.objects.create_user(username='ops', password='x', is_staff=True))
+        response = self.client.get('/api/rewards/')
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+
+    def test_fast_path_lists_report_serializer_time(self):
+        Reward.objects.bulk_create(
+            Reward(title=f'Sticker {i}', points=10, category='Gear', stock=5) for i in range(300)
+        )
+        self.client.force_authenticate(User.objects.create_user(username='ops', password='x', is_staff=True))
+        response = self.client.get('/api/rewards/')
+        self.assertEqual(len(response.json()), 301)
+        serialize = float(response['Server-Timing'].split('serialize;dur=')[1])
+        self.assertGreater(serialize, 0)
+        self.assertGreater(registry.snapshot()['reward-list']['serializer_duration'], 0)
+
+    def test_metrics_are_staff_only_prometheus_text(self):
+        self.client.get('/api/rewards/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.client.force_authenticate(User.objects.create_user(username='ops', password='x', is_staff=True))
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('api_requests_total{view="reward-list"} 1', response.content.decode())
+        self.assertIn('api_sql_queries_total{view="reward-list"} 1', response.content.decode())
+
+
+class DatabaseConfigTests(TestCase):
+    def test_sqlite_is_tuned_for_concurrent_writers(self):
+        config = database_config(Path('/srv'), {})
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA synchronous=NORMAL', config['OPTIONS']['init_command'])
+
+    def test_postgres_uses_persistent_connections_or_pool(self):
+        config = database_config(Path('/srv'), {'DB_ENGINE': 'postgres', 'CONN_MAX_AGE': '120'})
+        self.assertEqual(config['CONN_MAX_AGE'], 120)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        pooled = database_config(Path('/srv'), {'DB_ENGINE': 'postgres', 'DB_POOL_MAX_SIZE': '20'})
+        self.assertEqual(pooled['CONN_MAX_AGE'], 0)
+        self.assertEqual(pooled['OPTIONS']['pool']['max_size'], 20)
+
+    def test_sqlite_pragmas_are_applied(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+
+    def route_reads(self, method, pin=None, write_first=False, reads=1):
+        request = getattr(RequestFactory(), method.lower())('/api/rewards/')
+        if pin:
+            request.COOKIES[PIN_COOKIE] = pin
+        seen = []
+
+        def view(request):
+            if write_first:
+                self.router.db_for_write(Reward)
+            seen.extend(self.router.db_for_read(Reward) for _ in range(reads))
+            return HttpResponse()
+
+        self.response = ReplicaRoutingMiddleware(view)(request)
+        return seen
+
+    def route_read(self, *args, **kwargs):
+        return self.route_reads(*args, **kwargs)[0]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.route_read('GET'), 'replica1')
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_each_request_reads_from_one_replica(self):
+        requests = [set(self.route_reads('GET', reads=20)) for _ in range(20)]
+        self.assertTrue(all(len(aliases) == 1 for aliases in requests))
+        self.assertEqual(set.union(*requests), {'replica1', 'replica2'})
+
+    def test_unsafe_requests_and_non_request_code_use_primary(self):
+        self.assertEqual(self.route_read('POST'), 'default')
+        self.assertEqual(self.router.db_for_read(Reward), 'default')
+
+    def test_reads_after_a_write_use_primary(self):
+        self.assertEqual(self.route_read('GET', write_first=True), 'default')
+
+    def test_writer_is_pinned_to_primary(self):
+        self.route_read('POST')
+        pin = self.response.cookies[PIN_COOKIE].value
+        self.assertEqual(self.route_read('GET', pin=pin), 'default')
+        self.assertEqual(self.route_read('GET'), 'replica1')
+        self.assertNotIn(PIN_COOKIE, self.response.cookies)
+
+    def test_pin_expires_and_cannot_be_forged(self):
+        self.route_read('POST')
+        pin = self.response.cookies[PIN_COOKIE].value
+        self.assertEqual(self.route_read('GET', pin=pin.replace(':', ':x', 1)), 'replica1')
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 11):
+            self.assertEqual(self.route_read('GET', pin=pin), 'replica1')
+
+    def test_replica_configs_mirror_primary_in_tests(self):
+        replicas = replica_configs(Path('/srv'), {'SQLITE_REPLICA_PATHS': '/srv/a.sqlite3,/srv/b.sqlite3'})
+        self.assertEqual(list(replicas), ['replica1', 'replica2'])
+        self.assertEqual(replicas['replica2']['NAME'], '/srv/b.sqlite3')
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        self.client.force_login(self.user)
+
+    def test_repeat_requests_skip_session_user_and_profile_queries(self):
+        self.client.get('/api/auth/user/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/user/')
+        self.assertEqual(response.data['user']['username'], 'player')
+
+    def test_ledger_change_refreshes_cached_profile(self):
+        self.client.get('/api/auth/user/')
+        with self.captureOnCommitCallbacks(execute=True):
+            submit_game_serializer = GameSerializer(data={'title': 'Space Odyssey', 'developer': 'Indie', 'genre': 'Adventure'})
+            submit_game_serializer.is_valid(raise_exception=True)
+            submit_game(self.user, submit_game_serializer)
+        response = self.client.get('/api/auth/user/')
+        self.assertEqual(response.data['user']['points'], 25)
+
+
+class LoginHardeningTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='player', password='testpass123')
+
+    def login(self, password='testpass123', username='player'):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': password}, format='json')
+
+    def test_login_rehashes_outdated_password(self):
+        self.user.password = make_password('testpass123', hasher='pbkdf2_sha256')
+        self.user.save(update_fields=['password'])
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+
+    def test_username_throttle_rejects_before_hashing(self):
+        with mock.patch.dict(LoginUsernameThrottle.THROTTLE_RATES, {'login_username': '2/min'}):
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            with mock.patch('authapp.backends.verify_password') as verify:
+                response = self.login()
+        self.assertEqual(response.status_code, 429)
+        verify.assert_not_called()
+
+    def test_ip_throttle_ignores_client_supplied_forwarded_for(self):
+        with mock.patch.dict(LoginIPThrottle.THROTTLE_RATES, {'login_ip': '2/min'}):
+            statuses = [
+                self.client.post('/api/auth/login/', {'username': 'player', 'password': 'wrong'},
+                                 format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+                for i in range(3)
+            ]
+        self.assertEqual(statuses, [400, 400, 429])
+
+    def test_saturated_hashing_pool_returns_503(self):
+        with mock.patch('authapp.backends.verify_password', side_effect=HashingBusy):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    def test_pool_turns_away_callers_beyond_its_queue(self):
+        pool = HashingPool(workers=1, queue_size=0, timeout=5)
+        release = threading.Event()
+        worker = threading.Thread(target=pool.run, args=(release.wait,))
+        worker.start()
+        try:
+            with self.assertRaises(HashingBusy):
+                pool.run(make_password, 'testpass123')
+        finally:
+            release.set()
+            worker.join()
+        self.assertTrue(pool.run(make_password, 'testpass123').startswith('scrypt$'))
+
+
+class RosterRegistrationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', password='testpass123')
+        self.tournament = Tournament.objects.create(
+            title='League Night', game='Chess', start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1), max_participants=5, created_by=self.host
+        )
+        self.players = [User.objects.create_user(username=f'player{i}', password='x') for i in range(6)]
+        join_tournament(self.players[0], self.tournament)
+        self.client.force_authenticate(self.host)
+
+    def roster(self, **data):
+        return self.client.post(f'/api/tournaments/{self.tournament.pk}/roster/', data, format='json')
+
+    def test_registers_roster_with_set_based_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.roster(
+                userIds=[self.players[0].pk, self.players[1].pk, self.players[2].pk, 999999],
+                usernames=['player3', 'player4', 'ghost']
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {
+            'registered': 4, 'alreadyRegistered': [self.players[0].pk], 'unknown': [999999, 'ghost']
+        })
+        self.assertLess(len(queries), 20)
+        self.assertEqual(self.tournament.participants.count(), 5)
+        for player in self.players[1:5]:
+            self.assertEqual(UserProfile.objects.get(user=player).points, 10)
+            self.assertEqual(UserStats.objects.get(user=player).tournament_count, 1)
+        self.assertEqual(UserActivity.objects.filter(
+            tournament=self.tournament, activity_type='tournament_join'
+        ).exclude(user=self.players[0]).count(), 4)
+
+    def test_rejects_roster_that_exceeds_capacity(self):
+        response = self.roster(usernames=[player.username for player in self.players])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.tournament.participants.count(), 1)
+        self.assertEqual(UserProfile.objects.get(user=self.players[1]).points, 0)
+
+    def test_only_host_or_staff_can_register_roster(self):
+        self.client.force_authenticate(self.players[1])
+        self.assertEqual(self.roster(usernames=['player2']).status_code, 403)
+
+    def test_import_roster_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as roster:
+            roster.write('player1\nplayer2\n\nplayer1\n')
+        self.addCleanup(Path(roster.name).unlink)
+        out = StringIO()
+        call_command('import_roster', str(self.tournament.pk), roster.name, stdout=out)
+        self.assertIn('Registered 2 users', out.getvalue())
+        self.assertEqual(self.tournament.participants.count(), 3)
+
+
+class TournamentWaitlistTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create_user(username='host', password='testpass123')
+        self.tournament = Tournament.objects.create(
+            title='Finals', game='Chess', start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1), max_participants=2, created_by=host
+        )
+        self.users = [User.objects.create_user(username=f'player{i}', password='x') for i in range(4)]
+
+    def test_full_tournament_waitlists_in_order(self):
+        for user in self.users[:2]:
+            join_tournament(user, self.tournament)
+
+        for position, user in enumerate(self.users[2:], start=1):
+            self.client.force_authenticate(user)
+            response = self.client.post(f'/api/tournaments/{self.tournament.pk}/join/')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['waitlistPosition'], position)
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 2)
+        self.assertEqual(UserProfile.objects.get(user=self.users[2]).points, 0)
+        with self.assertRaises(LedgerError):
+            join_tournament(self.users[2], self.tournament)
+
+    def test_leave_promotes_head_of_waitlist(self):
+        for user in self.users:
+            join_tournament(user, self.tournament)
+
+        leave_tournament(self.users[0], self.tournament)
+
+        self.assertTrue(TournamentParticipant.objects.filter(user=self.users[2], tournament=self.tournament).exists())
+        self.assertEqual(UserProfile.objects.get(user=self.users[2]).points, 10)
+        self.assertEqual(list(self.tournament.waitlist.values_list('user', flat=True)), [self.users[3].pk])
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 2)
+
+        leave_tournament(self.users[3], self.tournament)
+        leave_tournament(self.users[1], self.tournament)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 1)
+        self.assertFalse(self.tournament.waitlist.exists())
+
+    def test_raising_capacity_promotes_waiting_users(self):
+        for user in self.users:
+            join_tournament(user, self.tournament)
+        Tournament.objects.filter(pk=self.tournament.pk).update(max_participants=3)
+
+        self.assertEqual(promote_waitlist(self.tournament), 1)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 3)
+        self.assertEqual(self.tournament.participants.count(), 3)
+        self.assertEqual(self.tournament.waitlist.count(), 1)
+
+    def test_admin_save_keeps_concurrent_seat_changes(self):
+        form = SimpleNamespace(changed_data=['title'])
+        stale = Tournament.objects.get(pk=self.tournament.pk)
+        join_tournament(self.users[0], self.tournament)
+
+        stale.title = 'Grand Finals'
+        TournamentAdmin(Tournament, admin.site).save_model(None, stale, form, change=True)
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.title, 'Grand Finals')
+        self.assertEqual(self.tournament.participant_count, 1)
+
+    def test_admin_participant_delete_goes_through_leave(self):
+        for user in self.users[:3]:
+            join_tournament(user, self.tournament)
+        participant_admin = TournamentParticipantAdmin(TournamentParticipant, admin.site)
+        self.assertFalse(participant_admin.has_add_permission(None))
+
+        participant_admin.delete_queryset(None, TournamentParticipant.objects.filter(user=self.users[0]))
+
+        self.assertTrue(self.tournament.participants.filter(user=self.users[2]).exists())
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 2)
+
+    def test_deleting_a_user_frees_their_seat(self):
+        for user in self.users:
+            join_tournament(user, self.tournament)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[0].delete()
+
+        self.assertTrue(self.tournament.participants.filter(user=self.users[2]).exists())
+        self.assertEqual(list(self.tournament.waitlist.values_list('user', flat=True)), [self.users[3].pk])
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk__in=[self.users[1].pk, self.users[3].pk]).delete()
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 1)
+        self.assertFalse(self.tournament.waitlist.exists())
+
+    def test_sync_participant_counts_command(self):
+        join_tournament(self.users[0], self.tournament)
+        Tournament.objects.filter(pk=self.tournament.pk).update(participant_count=5)
+
+        call_command('sync_participant_counts', stdout=StringIO())
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 1)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='ops', password='testpass123', is_staff=True)
+        self.player = User.objects.create_user(username='player', password='testpass123')
+        self.activities = [
+            UserActivity.objects.create(
+                user=self.player, activity_type='points_earned', description=f'Bonus {i}', points_change=i
+            )
+            for i in range(5)
+        ]
+        UserActivity.objects.filter(pk=self.activities[0].pk).update(created_at=timezone.now() - timedelta(days=10))
+        self.client.force_authenticate(self.staff)
+
+    def export(self, kind, **params):
+        response = self.client.get(f'/api/exports/{kind}/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.player)
+        self.assertEqual(self.client.get('/api/exports/activities/').status_code, 403)
+
+    def test_streams_csv_with_date_range(self):
+        start = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response, body = self.export('activities', start=start)
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual([row['description'] for row in rows], [f'Bonus {i}' for i in range(1, 5)])
+        self.assertEqual(rows[0]['username'], 'player')
+
+    def test_streams_gzipped_ndjson_since_cursor(self):
+        response, body = self.export('activities', output='ndjson', gzip='1', since=self.activities[2].pk)
+
+        self.assertIn('activities.ndjson.gz', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [a.pk for a in self.activities[3:]])
+
+    async def test_streams_chunk_by_chunk_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        with mock.patch('authapp.views.EXPORT_CHUNK_SIZE', 2):
+            response = await self.async_client.get('/api/exports/activities/', {'output': 'ndjson'})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [a.pk for a in self.activities])
+
+    def test_rejects_bad_filters(self):
+        self.assertEqual(self.client.get('/api/exports/activities/', {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/exports/everything/').status_code, 404)
+
+    def test_export_command_writes_file(self):
+        reward = Reward.objects.create(title='Gaming Headset', points=100, category='Gear', stock=5)
+        UserReward.objects.create(user=self.player, reward=reward)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'claims.csv.gz'
+            call_command('export_data', 'claims', '--gzip', '--file', str(path), stderr=StringIO())
+            rows = list(csv.DictReader(StringIO(gzip.decompress(path.read_bytes()).decode())))
+        self.assertEqual([(row['username'], row['reward'], row['points']) for row in rows],
+                         [('player', 'Gaming Headset', '100')])
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            title='Zephyrcup Championship', game='Starcraft', description='Zephyrcup finals',
+            start_date=now, end_date=now, status='active', created_by=self.user
+        )
+        Tournament.objects.create(
+            title='Weekly Cup', game='Starcraft', description='Open to zephyrcup qualifiers',
+            start_date=now, end_date=now, created_by=self.user
+        )
+        self.game = Game.objects.create(
+            title='Zephyrfall', developer='Indie', genre='Strategy', submitted_by=self.user
+        )
+        self.reward = Reward.objects.create(title='Zephyr Mousepad', points=50, category='Gear', stock=5)
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_prefix_match_ranked_by_title_weight(self):
+        results = self.search(q='zephyrc')
+        self.assertEqual([r['title'] for r in results], ['Zephyrcup Championship', 'Weekly Cup'])
+        self.assertEqual(results[0], {
+            'type': 'tournament', 'id': self.tournament.pk, 'title': 'Zephyrcup Championship',
+            'status': 'active', 'game': 'Starcraft'
+        })
+
+    def test_filters_by_type_status_and_facet(self):
+        self.assertEqual({r['type'] for r in self.search(q='zeph')}, {'tournament', 'game', 'reward'})
+        self.assertEqual([r['id'] for r in self.search(q='zeph', genre='Strategy')], [self.game.pk])
+        self.assertEqual([r['id'] for r in self.search(q='zeph', category='Gear')], [self.reward.pk])
+        self.assertEqual([r['id'] for r in self.search(q='zeph', type='tournament', status='active')],
+                         [self.tournament.pk])
+        self.assertEqual(self.search(q='zeph', genre='Puzzle'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.game.title = 'Quasarfall'
+        self.game.save()
+        self.reward.is_active = False
+        self.reward.save()
+        self.tournament.delete()
+
+        self.assertEqual([r['title'] for r in self.search(q='quasar')], ['Quasarfall'])
+        self.assertEqual([r['title'] for r in self.search(q='zephyr')], ['Weekly Cup'])
+
+    def test_rebuild_matches_incremental_index(self):
+        before = self.search(q='zeph')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search(q='zeph'), before)
+
+    def test_rejects_missing_query_and_unknown_type(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'zeph', 'type': 'user'}).status_code, 400)
+
+
+class RealtimeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.broker = Broker(queue_size=2)
+        patcher = mock.patch('authapp.realtime._broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.user = User.objects.create_user(username='player', password='testpass123')
+
+    def subscribe(self, *topics):
+        async def subscribe():
+            return self.broker.subscribe(topics)
+        return self.loop.run_until_complete(subscribe())
+
+    def drain(self, subscription):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(subscription.queue.get_nowait())
+        return messages
+
+    def test_publishes_from_other_threads_and_drops_oldest_when_full(self):
+        subscription = self.subscribe('rewards')
+        other = self.subscribe('tournaments')
+        worker = threading.Thread(target=lambda: [
+            self.broker.publish('rewards', 'reward.stock', {'id': 1, 'stock': stock}) for stock in (3, 2, 1)
+        ])
+        worker.start()
+        worker.join()
+
+        self.assertEqual(self.drain(subscription), [
+            b'event: reward.stock\ndata: {"id":1,"stock":2}\n\n',
+            b'event: reward.stock\ndata: {"id":1,"stock":1}\n\n',
+        ])
+        self.assertEqual(self.drain(other), [])
+        self.broker.unsubscribe(subscription)
+        self.assertFalse(self.broker.wants('rewards'))
+
+    def test_ledger_changes_publish_after_commit(self):
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            title='Finals', game='Chess', start_date=now, end_date=now, max_participants=8, created_by=self.user
+        )
+        reward = Reward.objects.create(title='Mousepad', points=5, category='Gear', stock=3)
+        public = self.subscribe('tournaments', 'rewards')
+        private = self.subscribe(f'user:{self.user.pk}')
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            join_tournament(self.user, tournament)
+        self.assertEqual(self.drain(public), [])
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_reward(self.user, reward.pk)
+
+        events = [message.decode().split('\n')[:2] for message in self.drain(public)]
+        self.assertEqual(events, [
+            ['event: tournament.participants',
+             f'data: {{"id":{tournament.pk},"participant_count":1,"max_participants":8}}'],
+            ['event: reward.stock', f'data: {{"id":{reward.pk},"stock":2}}'],
+        ])
+        self.assertEqual(self.drain(private)[-1], b'event: user.points\ndata: {"points":5}\n\n')
+
+    def test_relay_survives_redis_errors(self):
+        class Stop(Exception):
+            pass
+
+        class FakePubSub:
+            def __init__(self, items):
+                self.items = items
+
+            def subscribe(self, channel):
+                pass
+
+            def listen(self):
+                if self.items is None:
+                    raise ConnectionError('connection reset')
+                return iter(self.items)
+
+        relayed = {'data': json.dumps(['rewards', encode_event('reward.stock', {'id': 1, 'stock': 0}).decode()])}
+        client = mock.Mock()
+        client.publish.side_effect = ConnectionError('connection refused')
+        client.pubsub.side_effect = [FakePubSub(None), FakePubSub([relayed])]
+        relay = RedisRelay.__new__(RedisRelay)
+        relay.broker, relay._client = self.broker, client
+        self.broker.relay = relay
+        subscription = self.subscribe('rewards')
+
+        with self.assertLogs('authapp.realtime', 'ERROR'):
+            self.broker.publish('rewards', 'reward.stock', {'id': 1, 'stock': 1})
+        # Whatever else goes wrong after commit is logged, not raised into the committed write.
+        with self.assertLogs('django.test', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            publish_after_commit('rewards', 'reward.stock', mock.Mock(side_effect=OperationalError))
+        with mock.patch('authapp.realtime.time.sleep', side_effect=[None, Stop]), \
+                self.assertLogs('authapp.realtime', 'ERROR'), self.assertRaises(Stop):
+            relay._listen()
+        self.assertEqual(self.drain(subscription), [b'event: reward.stock\ndata: {"id":1,"stock":0}\n\n'])
+
+    def test_event_stream_refuses_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    async def test_event_stream_requires_login_and_streams_subscribed_topics(self):
+        self.assertEqual((await self.async_client.get('/api/events/')).status_code, 401)
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.async_client.get('/api/events/', {'topics': 'users'})).status_code, 400)
+
+        response = await self.async_client.get('/api/events/', {'topics': 'rewards,points'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b'retry: 5000\n\n')
+        self.assertTrue(self.broker.wants(f'user:{self.user.pk}'))
+        self.broker.publish('rewards', 'reward.stock', {'id': 7, 'stock': 0})
+        self.assertEqual(await anext(content), b'event: reward.stock\ndata: {"id":7,"stock":0}\n\n')
+        await content.aclose()
+
+
+@override_settings(CACHES=NO_CACHE)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            title='Finals', game='Chess', start_date=now, end_date=now, created_by=self.user
+        )
+        Reward.objects.create(title='Mousepad', points=5, category='Gear', stock=3)
+        join_tournament(self.user, tournament)
+        self.paths = [
+            '/api/auth/user/', '/api/tournaments/', f'/api/tournaments/{tournament.pk}/',
+            '/api/tournaments/?page_size=1', '/api/rewards/?min_points=1', '/api/dashboard/',
+        ]
+        self.client.force_login(self.user)
+        # The sync test client runs the same views through the WSGI handler.
+        self.expected = {path: self.client.get(path).json() for path in self.paths}
+
+    async def test_asgi_responses_match_wsgi(self):
+        self.async_client.cookies = self.client.cookies
+        for path in self.paths:
+            response = await self.async_client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.json(), self.expected[path], path)
+
+    @override_settings(CONDITIONAL_GET=True, CACHES=LOCAL_CACHE)
+    async def test_validators_and_metrics_work_on_the_event_loop(self):
+        await self.async_client.aforce_login(self.user)
+        with self.settings(DEBUG=True):
+            first = await self.async_client.get('/api/dashboard/')
+        self.assertNotIn('desc="0 queries"', first['Server-Timing'])
+        second = await self.async_client.get('/api/dashboard/', headers={'if-none-match': first['ETag']})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual((await self.async_client.get('/api/rewards/?sort=title')).status_code, 400)
+        self.async_client.cookies.clear()
+        self.assertEqual((await self.async_client.get('/api/tournaments/')).status_code, 403)
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create_user(username='h\u00f4te', password='x')
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            title='Coupe \u2028 \U0001F3C6', game='Chess', description='tab\there "quoted" \\ \x01',
+            start_date=now.replace(microsecond=0), end_date=now, prize_pool=None, created_by=host
+        )
+        reward = Reward.objects.create(title='Mousepad', points=5, category='Gear', stock=3, image_url=None)
+        Reward.objects.create(title='Retired', points=9, category='Gear', stock=0, is_active=False,
+                              image_url='https://example.com/r.png')
+        Game.objects.create(title='\u0644\u0639\u0628\u0629', developer='Studio', genre='MOBA', submitted_by=host)
+        join_tournament(host, tournament)
+        claim_reward(host, reward.pk)
+        log_activity(host, 'login', 'Logged in \u2029')
+
+    def assertSameBytes(self, serializer_class, fast):
+        model = serializer_class.Meta.model
+        queryset = getattr(serializer_class, 'setup_eager_loading', lambda qs: qs)(model.objects.all())
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(FastJSONRenderer().render(fast.serialize(model.objects.all())), expected)
+        with mock.patch('authapp.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(fast.serialize(model.objects.all())), expected)
+
+    def test_output_is_byte_identical_to_drf(self):
+        for timezone_name in ('UTC', 'Asia/Riyadh'):
+            with timezone.override(timezone_name):
+                for serializer_class, fast in FAST_SERIALIZERS.items():
+                    with self.subTest(serializer_class.__name__, timezone=timezone_name):
+                        self.assertSameBytes(serializer_class, fast)
+
+    def test_list_views_render_the_same_bytes(self):
+        self.client.force_login(User.objects.get())
+        for path, serializer_class, queryset in [
+            ('/api/rewards/', RewardSerializer, Reward.objects.filter(is_active=True)),
+            ('/api/games/', GameSerializer, Game.objects.select_related('submitted_by')),
+            ('/api/tournaments/user/', TournamentParticipantSerializer,
+             TournamentParticipant.objects.select_related('tournament__created_by')),
+        ]:
+            with self.subTest(path):
+                expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+                self.assertEqual(self.client.get(path).content, expected)
+
+    def test_fields_without_a_column_need_a_computed_entry(self):
+        with self.assertRaises(ImproperlyConfigured):
+            FastSerializer(UserActivitySerializer)
+        FastSerializer(UserActivitySerializer, {
+            'tournament': Computed(['tournament__title']), 'reward': Computed(['reward__title']),
+        })
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', password='testpass123')
+        UserProfile.objects.filter(user=self.user).update(points=1000)
+        host = User.objects.create_user(username='host', password='testpass123')
+        now = timezone.now()
+        self.tournaments = [
+            Tournament.objects.create(
+                title=f'Tournament {i}', game='FIFA 24',
+                start_date=now, end_date=now + timedelta(days=1), created_by=host
+            )
+            for i in range(3)
+        ]
+        self.reward = Reward.objects.create(title='Gaming Mouse', points=300, category='Gaming Gear', stock=5)
+
+    def assertStatsMatchSource(self):
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.tournament_count, TournamentParticipant.objects.filter(user=self.user).count())
+        self.assertEqual(stats.reward_count, UserReward.objects.filter(user=self.user).count())
+        self.assertEqual(stats.last_activity_at,
+                         UserActivity.objects.filter(user=self.user).latest('created_at').created_at)
+
+    def test_ledger_keeps_stats_current(self):
+        for tournament in self.tournaments:
+            join_tournament(self.user, tournament)
+        leave_tournament(self.user, self.tournaments[0])
+        claim_reward(self.user, self.reward.pk)
+        self.assertStatsMatchSource()
+
+    def test_rebuild_command_reconciles_drift(self):
+        for tournament in self.tournaments:
+            TournamentParticipant.objects.create(user=self.user, tournament=tournament)
+        UserReward.objects.create(user=self.user, reward=self.reward)
+        UserActivity.objects.create(user=self.user, activity_type='login', description='User player logged in')
+        UserStats.objects.filter(user=self.user).delete()
+
+        call_command('rebuild_user_stats', batch_size=1, stdout=StringIO())
+
+        self.assertStatsMatchSource()
+        self.assertEqual(UserStats.objects.count(), User.objects.count())
+
+
+class QueryPlanTests(TestCase):
+    def test_view_queries_use_indexes(self):
+        call_command('explain_queries', stdout=StringIO())
+
+
+def run_concurrently(target, args_list):
+    """Start one thread per argument tuple behind a barrier and collect results or errors."""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+
+    def worker(index, args):
+        try:
+            barrier.wait()
+            results[index] = target(*args)
+        except Exception as e:
+            results[index] = e
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i, args)) for i, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class RouteCoverageTests(SimpleTestCase):
+    def url_names(self, patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.app_name != 'admin':
+                    yield from self.url_names(pattern.url_patterns)
+            else:
+                yield pattern.name
+
+    def test_load_test_drives_every_api_route(self):
+        spec = importlib.util.spec_from_file_location(
+            'loadtest', Path(settings.BASE_DIR) / 'benchmarks' / 'loadtest.py'
+        )
+        loadtest = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(loadtest)
+        ids = {'tournaments': [1], 'open_tournaments': [1], 'rewards': [1], 'games': [1]}
+        driven = {resolve(path().split('?')[0]).url_name
+                  for _, _, path, _ in loadtest.routes(random.Random(0), ids)}
+        self.assertEqual(set(self.url_names(get_resolver().url_patterns)) - driven, {'event-stream'})
+
+
+class LedgerConcurrencyTests(TransactionTestCase):
+    def make_user(self, username, points=0):
+        user = User.objects.create_user(username=username, password='testpass123')
+        UserProfile.objects.filter(user=user).update(points=points)
+        return user
+
+    def test_last_unit_of_stock_is_claimed_once(self):
+        reward = Reward.objects.create(title='Gaming Headset', points=100, category='Gaming Gear', stock=1)
+        users = [self.make_user(f'player{i}', points=150) for i in range(12)]
+
+        results = run_concurrently(claim_reward, [(user, reward.pk) for user in users])
+
+        successes = [r for r in results if isinstance(r, UserReward)]
+        rejections = [r for r in results if isinstance(r, LedgerError)]
+        self.assertEqual(len(successes), 1)
+        self.assertEqual(len(rejections), len(users) - 1)
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 0)
+        self.assertEqual(UserReward.objects.count(), 1)
+        total_points = sum(UserProfile.objects.values_list('points', flat=True))
+        self.assertEqual(total_points, 150 * len(users) - 100)
+        self.assertEqual(UserActivity.objects.filter(activity_type='reward_claim').count(), 1)
+
+    def test_concurrent_joins_lose_no_points(self):
+        user = self.make_user('player')
+        host = self.make_user('host')
+        now = timezone.now()
+        tournaments = [
+            Tournament.objects.create(
+                title=f'Tournament {i}', game='FIFA 24',
+                start_date=now, end_date=now + timedelta(days=1), created_by=host
+            )
+            for i in range(12)
+        ]
+
+        results = run_concurrently(join_tournament, [(user, t) for t in tournaments])
+
+        self.assertTrue(all(isinstance(r, TournamentParticipant) for r in results), results)
+        self.assertEqual(UserProfile.objects.get(user=user).points, 10 * len(tournaments))
+        self.assertEqual(UserActivity.objects.filter(user=user, activity_type='tournament_join').count(),
+                         len(tournaments))
+
+    def test_concurrent_joins_never_overbook(self):
+        tournament = Tournament.objects.create(
+            title='Opening Night', game='Valorant', start_date=timezone.now(),
+            end_date=timezone.now(), max_participants=5, created_by=self.make_user('host')
+        )
+        users = [self.make_user(f'player{i}') for i in range(40)]
+
+        results = run_concurrently(join_tournament, [(user, tournament) for user in users])
+
+        self.assertFalse([r for r in results if isinstance(r, Exception)], results)
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.participant_count, 5)
+        self.assertEqual(tournament.participants.count(), 5)
+        self.assertEqual(tournament.waitlist.count(), 35)
+        self.assertEqual(sum(UserProfile.objects.values_list('points', flat=True)), 50)
+
+        run_concurrently(leave_tournament, [(p.user, tournament) for p in tournament.participants.all()])
+
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.participant_count, 5)
+        self.assertEqual(tournament.participants.count(), 5)
+        self.assertEqual(tournament.waitlist.count(), 30)
+
+    def test_duplicate_concurrent_joins_credit_once(self):
+        user = self.make_user('player')
+        tournament = Tournament.objects.create(
+            title='Rocket League Pro Series', game='Rocket League',
+            start_date=timezone.now(), end_date=timezone.now(), created_by=self.make_user('host')
+        )
+
+        run_concurrently(join_tournament, [(user, tournament)] * 8)
+
+        self.assertEqual(TournamentParticipant.objects.filter(user=user).count(), 1)
+        self.assertEqual(UserProfile.objects.get(user=user).points, 10)
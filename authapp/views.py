@@ -1,26 +1,83 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.contrib.auth import login, logout
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db.models import Count, Q
+from .async_views import async_api_view
+from .caching import cached_response, cache_stats
+from .filters import TOURNAMENT_FILTERS, GAME_FILTERS, REWARD_FILTERS
+from .dates import parse_bound
+from .exports import EXPORTS, FORMATS, aiterate, export_filename, stream_export
+from .fast_serializers import fast_serializer
+from .hashing import HashingBusy
+from .conditional import (
+    conditional_get, catalog_etag, catalog_last_modified, dashboard_etag, dashboard_last_modified,
+    aload_dashboard_state
+)
+from .instrumentation import registry
+from .leaderboard import leaderboard
+from .search import DOCUMENT_TYPES, MAX_RESULTS, search
+from .pagination import paginated_response, apaginated_response
+from .realtime import PUBLIC_TOPICS, event_messages, get_broker, user_topic
+from .renderers import FastJSONRenderer
+from .services import (
+    LedgerError, log_activity, join_tournament, leave_tournament, claim_reward, submit_game,
+    register_roster, rebuild_user_stats, waitlist_position
+)
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer,
-    TournamentSerializer, TournamentParticipantSerializer,
+    TournamentSerializer, TournamentParticipantSerializer, RosterSerializer,
     RewardSerializer, UserRewardSerializer,
     GameSerializer, UserActivitySerializer
 )
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle
 from .models import (
-    Tournament, TournamentParticipant,
+    UserProfile, UserStats, Tournament, TournamentParticipant, TournamentWaitlistEntry,
     Reward, UserReward, Game, UserActivity
 )
 
+HASHING_BUSY_RETRY_SECONDS = 5
+
+# For list views served by the fast serializers, whose payloads carry no floats.
+FAST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
+
+
+def _hashing_busy():
+    response = Response({'error': 'Server busy, try again shortly'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(HASHING_BUSY_RETRY_SECONDS)
+    return response
+
+def _filtered_response(request, filtered, serializer_class):
+    return paginated_response(
+        request, filtered.queryset, serializer_class, filtered.ordering_field,
+        descending=filtered.descending, paginate=filtered.paginate
+    )
+
+async def _afiltered_response(request, filtered, serializer_class):
+    return await apaginated_response(
+        request, filtered.queryset, serializer_class, filtered.ordering_field,
+        descending=filtered.descending, paginate=filtered.paginate
+    )
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterIPThrottle])
 def register_view(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except HashingBusy:
+            return _hashing_busy()
         login(request, user)
         return Response({
             'user': UserSerializer(user).data,
@@ -30,17 +87,17 @@ def register_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login_view(request):
     serializer = LoginSerializer(data=request.data)
-    if serializer.is_valid():
+    try:
+        valid = serializer.is_valid()
+    except HashingBusy:
+        return _hashing_busy()
+    if valid:
         user = serializer.validated_data
         login(request, user)
-        UserActivity.objects.create(
-            user=user,
-            activity_type='login',
-            description=f"User {user.username} logged in",
-            points_change=0
-        )
+        log_activity(user, 'login', f"User {user.username} logged in")
         return Response({
             'user': UserSerializer(user).data,
             'message': 'Login successful'
@@ -55,33 +112,47 @@ def logout_view(request):
         'message': 'Logout successful'
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET'])
+async def _load_profile(user):
+    # The auth backend loads the profile along with the user; other login paths may not.
+    if not User.profile.is_cached(user):
+        user.profile = await UserProfile.objects.aget(user=user)
+    return user
+
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def user_view(request):
+async def user_view(request):
+    await _load_profile(request.user)
     return Response({
         'user': UserSerializer(request.user).data
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET', 'POST'])
+@conditional_get(catalog_etag('tournaments'), catalog_last_modified('tournaments'))
+@async_api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
-def tournament_list(request):
+@renderer_classes(FAST_RENDERERS)
+@cached_response('tournaments')
+async def tournament_list(request):
     if request.method == 'GET':
-        tournaments = Tournament.objects.all()
-        serializer = TournamentSerializer(tournaments, many=True)
-        return Response(serializer.data)
+        tournaments = TOURNAMENT_FILTERS.apply(
+            request, TournamentSerializer.setup_eager_loading(Tournament.objects.all())
+        )
+        return await _afiltered_response(request, tournaments, TournamentSerializer)
 
     elif request.method == 'POST':
         serializer = TournamentSerializer(data=request.data)
         if serializer.is_valid():
-            tournament = serializer.save(created_by=request.user)
+            # Model saves fire the cache and search signal handlers, which are sync.
+            await sync_to_async(serializer.save)(created_by=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-@api_view(['GET'])
+@conditional_get(catalog_etag('tournaments'), catalog_last_modified('tournaments'))
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def tournament_detail(request, pk):
+@cached_response('tournaments')
+async def tournament_detail(request, pk):
     try:
-        tournament = Tournament.objects.get(pk=pk)
+        tournament = await TournamentSerializer.setup_eager_loading(Tournament.objects.all()).aget(pk=pk)
         serializer = TournamentSerializer(tournament)
         return Response(serializer.data)
     except Tournament.DoesNotExist:
@@ -92,68 +163,75 @@ def tournament_detail(request, pk):
 def tournament_join(request, pk):
     try:
         tournament = Tournament.objects.get(pk=pk)
-
-        if TournamentParticipant.objects.filter(user=request.user, tournament=tournament).exists():
-            return Response({'error': 'Already joined this tournament'}, status=status.HTTP_400_BAD_REQUEST)
-
-        participant = TournamentParticipant.objects.create(
-            user=request.user,
-            tournament=tournament
-        )
-
-        UserActivity.objects.create(
-            user=request.user,
-            tournament=tournament,
-            activity_type='tournament_join',
-            description=f"Joined tournament: {tournament.title}",
-            points_change=10
-        )
-
-        request.user.profile.points += 10
-        request.user.profile.save()
-
+        joined = join_tournament(request.user, tournament)
+        if isinstance(joined, TournamentWaitlistEntry):
+            return Response({
+                'message': 'Tournament is full; added to the waitlist',
+                'waitlistPosition': waitlist_position(joined)
+            }, status=status.HTTP_202_ACCEPTED)
         return Response({'message': 'Successfully joined tournament'}, status=status.HTTP_201_CREATED)
     except Tournament.DoesNotExist:
         return Response({'error': 'Tournament not found'}, status=status.HTTP_404_NOT_FOUND)
+    except LedgerError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def tournament_leave(request, pk):
     try:
         tournament = Tournament.objects.get(pk=pk)
-        participant = TournamentParticipant.objects.get(user=request.user, tournament=tournament)
-        participant.delete()
-
-        UserActivity.objects.create(
-            user=request.user,
-            tournament=tournament,
-            activity_type='tournament_leave',
-            description=f"Left tournament: {tournament.title}",
-            points_change=-10
-        )
-
-        request.user.profile.points = max(0, request.user.profile.points - 10)
-        request.user.profile.save()
-
+        leave_tournament(request.user, tournament)
         return Response({'message': 'Successfully left tournament'}, status=status.HTTP_200_OK)
     except Tournament.DoesNotExist:
         return Response({'error': 'Tournament not found'}, status=status.HTTP_404_NOT_FOUND)
-    except TournamentParticipant.DoesNotExist:
-        return Response({'error': 'Not enrolled in this tournament'}, status=status.HTTP_400_BAD_REQUEST)
+    except LedgerError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def tournament_roster(request, pk):
+    try:
+        tournament = Tournament.objects.get(pk=pk)
+    except Tournament.DoesNotExist:
+        return Response({'error': 'Tournament not found'}, status=status.HTTP_404_NOT_FOUND)
+    if tournament.created_by_id != request.user.pk and not request.user.is_staff:
+        return Response({'error': 'Only the tournament host can register a roster'},
+                        status=status.HTTP_403_FORBIDDEN)
+
+    serializer = RosterSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result = register_roster(
+            tournament,
+            user_ids=serializer.validated_data.get('userIds', []),
+            usernames=serializer.validated_data.get('usernames', [])
+        )
+    except LedgerError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'registered': result['registered'],
+        'alreadyRegistered': result['already_registered'],
+        'unknown': result['unknown'],
+    }, status=status.HTTP_201_CREATED)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(FAST_RENDERERS)
 def user_tournaments(request):
-    participations = TournamentParticipant.objects.filter(user=request.user)
-    serializer = TournamentParticipantSerializer(participations, many=True)
-    return Response(serializer.data)
+    participations = TournamentParticipantSerializer.setup_eager_loading(
+        TournamentParticipant.objects.filter(user=request.user)
+    )
+    return paginated_response(request, participations, TournamentParticipantSerializer, 'joined_at')
 
-@api_view(['GET'])
+@conditional_get(catalog_etag('rewards'), catalog_last_modified('rewards'))
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def reward_list(request):
-    rewards = Reward.objects.filter(is_active=True)
-    serializer = RewardSerializer(rewards, many=True)
-    return Response(serializer.data)
+@renderer_classes(FAST_RENDERERS)
+@cached_response('rewards')
+async def reward_list(request):
+    rewards = REWARD_FILTERS.apply(request, Reward.objects.filter(is_active=True))
+    return await _afiltered_response(request, rewards, RewardSerializer)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -164,70 +242,36 @@ def reward_claim(request):
         return Response({'error': 'Reward ID is required'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        reward = Reward.objects.get(pk=reward_id)
-
-        if not reward.is_active:
-            return Response({'error': 'Reward is not active'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if reward.stock <= 0:
-            return Response({'error': 'Reward is out of stock'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if request.user.profile.points < reward.points:
-            return Response({'error': 'Insufficient points'}, status=status.HTTP_400_BAD_REQUEST)
-
-        user_reward = UserReward.objects.create(
-            user=request.user,
-            reward=reward
-        )
-
-        request.user.profile.points -= reward.points
-        request.user.profile.save()
-
-        reward.stock -= 1
-        reward.save()
-
-        UserActivity.objects.create(
-            user=request.user,
-            reward=reward,
-            activity_type='reward_claim',
-            description=f"Claimed reward: {reward.title}",
-            points_change=-reward.points
-        )
-
+        claim_reward(request.user, reward_id)
         return Response({'message': 'Reward claimed successfully'}, status=status.HTTP_201_CREATED)
     except Reward.DoesNotExist:
         return Response({'error': 'Reward not found'}, status=status.HTTP_404_NOT_FOUND)
+    except LedgerError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(FAST_RENDERERS)
 def user_rewards(request):
-    user_rewards = UserReward.objects.filter(user=request.user)
-    serializer = UserRewardSerializer(user_rewards, many=True)
-    return Response(serializer.data)
+    user_rewards = UserRewardSerializer.setup_eager_loading(
+        UserReward.objects.filter(user=request.user)
+    )
+    return paginated_response(request, user_rewards, UserRewardSerializer, 'claimed_at')
 
+@conditional_get(catalog_etag('games'), catalog_last_modified('games'))
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(FAST_RENDERERS)
+@cached_response('games')
 def game_list(request):
     if request.method == 'GET':
-        games = Game.objects.all()
-        serializer = GameSerializer(games, many=True)
-        return Response(serializer.data)
+        games = GAME_FILTERS.apply(request, GameSerializer.setup_eager_loading(Game.objects.all()))
+        return _filtered_response(request, games, GameSerializer)
 
     elif request.method == 'POST':
         serializer = GameSerializer(data=request.data)
         if serializer.is_valid():
-            game = serializer.save(submitted_by=request.user)
-
-            UserActivity.objects.create(
-                user=request.user,
-                activity_type='points_earned',
-                description=f"Submitted game: {game.title}",
-                points_change=25
-            )
-
-            request.user.profile.points += 25
-            request.user.profile.save()
-
+            submit_game(request.user, serializer)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -248,27 +292,161 @@ def game_update_status(request, pk):
     except Game.DoesNotExist:
         return Response({'error': 'Game not found'}, status=status.HTTP_404_NOT_FOUND)
 
-@api_view(['GET'])
+DASHBOARD_PREVIEW_SIZE = 20
+
+async def _user_stats(user):
+    try:
+        return await UserStats.objects.aget(user=user)
+    except UserStats.DoesNotExist:
+        await sync_to_async(rebuild_user_stats)(User.objects.filter(pk=user.pk))
+        return await UserStats.objects.aget(user=user)
+
+async def _preview(serializer_class, queryset):
+    return await fast_serializer(serializer_class).aserialize(queryset[:DASHBOARD_PREVIEW_SIZE])
+
+@conditional_get(dashboard_etag, dashboard_last_modified, aprepare=aload_dashboard_state)
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def dashboard_data(request):
+@renderer_classes(FAST_RENDERERS)
+async def dashboard_data(request):
     user = request.user
 
-    tournaments = TournamentParticipant.objects.filter(user=user)
-    rewards = UserReward.objects.filter(user=user)
-    activities = UserActivity.objects.filter(user=user)[:20]
-
-    total_tournaments = tournaments.count()
-    total_rewards = rewards.count()
-    total_points = user.profile.points
+    stats, tournaments, rewards, activities, _ = await asyncio.gather(
+        _user_stats(user),
+        _preview(TournamentParticipantSerializer, TournamentParticipant.objects.filter(user=user)),
+        _preview(UserRewardSerializer, UserReward.objects.filter(user=user)),
+        _preview(UserActivitySerializer, UserActivity.objects.filter(user=user)),
+        _load_profile(user),
+    )
 
     return Response({
         'user': UserSerializer(user).data,
-        'tournaments': TournamentParticipantSerializer(tournaments, many=True).data,
-        'rewards': UserRewardSerializer(rewards, many=True).data,
-        'activity': UserActivitySerializer(activities, many=True).data,
+        'tournaments': tournaments,
+        'rewards': rewards,
+        'activity': activities,
         'stats': {
-            'totalTournaments': total_tournaments,
-            'totalRewards': total_rewards,
-            'totalPoints': total_points,
+            'totalTournaments': stats.tournament_count,
+            'totalRewards': stats.reward_count,
+            'totalPoints': user.profile.points,
+            'lastActivityAt': stats.last_activity_at,
         }
     })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    return Response(cache_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def performance_metrics(request):
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4')
+
+EXPORT_CHUNK_SIZE = 2000
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_data(request, kind):
+    if kind not in EXPORTS:
+        return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+    output = request.query_params.get('output', 'csv')
+    if output not in FORMATS:
+        return Response({'error': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+    try:
+        start = parse_bound(request.query_params.get('start'))
+        end = parse_bound(request.query_params.get('end'))
+        since = request.query_params.get('since')
+        since = int(since) if since else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    chunks = stream_export(kind, output, compress, start=start, end=end, since=since, chunk_size=EXPORT_CHUNK_SIZE)
+    if isinstance(request._request, ASGIRequest):
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if compress else FORMATS[output][0])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(kind, output, compress)}"'
+    return response
+
+LEADERBOARD_MAX_LIMIT = 100
+
+def _bounded_int(value, default, maximum):
+    try:
+        return max(0, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def leaderboard_top(request):
+    limit = _bounded_int(request.query_params.get('limit'), 10, LEADERBOARD_MAX_LIMIT)
+    return Response(leaderboard.top(limit))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def leaderboard_me(request):
+    radius = _bounded_int(request.query_params.get('radius'), 5, LEADERBOARD_MAX_LIMIT // 2)
+    rank = leaderboard.rank(request.user.pk)
+    if rank is None:
+        leaderboard.refresh_user(request.user.pk)
+        rank = leaderboard.rank(request.user.pk)
+    return Response({
+        'rank': rank,
+        'neighbors': leaderboard.around(request.user.pk, radius),
+    })
+
+SEARCH_FACETS = ('game', 'genre', 'category')
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_catalog(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    types = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+    if any(kind not in DOCUMENT_TYPES for kind in types):
+        return Response({'error': f"type must be one of {', '.join(DOCUMENT_TYPES)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    facets = {name: request.query_params[name] for name in SEARCH_FACETS if request.query_params.get(name)}
+    results = search(
+        query,
+        types=types,
+        status=request.query_params.get('status') or None,
+        facets=facets,
+        limit=_bounded_int(request.query_params.get('limit'), 20, MAX_RESULTS)
+    )
+    return Response({'results': results})
+
+EVENT_TOPICS = (*PUBLIC_TOPICS, 'points')
+
+# A plain async view: DRF's request handling is synchronous, and the stream has
+# to live on the event loop so idle clients hold no worker thread.
+async def event_stream(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        # WSGI drains a streaming body to the end before sending it, and this one never ends.
+        return JsonResponse({'error': 'Live updates need the ASGI application (backend.asgi:application)'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    requested = [topic for topic in request.GET.get('topics', ','.join(EVENT_TOPICS)).split(',') if topic]
+    if not requested or any(topic not in EVENT_TOPICS for topic in requested):
+        return JsonResponse({'error': f"topics must be drawn from {', '.join(EVENT_TOPICS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_topic(user.pk) if topic == 'points' else topic for topic in requested)
+
+    async def stream():
+        try:
+            async for message in event_messages(subscription, settings.REALTIME_HEARTBEAT_SECONDS):
+                yield message
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,108 @@
+"""
+Environment-driven database configuration.
+
+``DB_ENGINE=sqlite`` (the default) tunes SQLite for concurrent writers:
+WAL journaling, a busy timeout, ``synchronous=NORMAL``, memory-mapped I/O and
+``BEGIN IMMEDIATE`` transactions so writers queue instead of failing with
+"database is locked".
+
+``DB_ENGINE=postgres`` configures psycopg with persistent, health-checked
+connections, or a psycopg connection pool when ``DB_POOL_MAX_SIZE`` is set.
+Point it at a local Postgres stand-in (for example a throwaway container) and
+the whole test suite, concurrency tests included, runs against it.
+"""
+import os
+
+
+def _int(env, name, default):
+    return int(env.get(name, default))
+
+
+def sqlite_config(env, base_dir):
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA busy_timeout={_int(env, 'SQLITE_BUSY_TIMEOUT_MS', 5000)}",
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={_int(env, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        'PRAGMA temp_store=MEMORY',
+    ]
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('SQLITE_PATH', base_dir / 'db.sqlite3'),
+        'OPTIONS': {
+            'init_command': ';'.join(pragmas),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': _int(env, 'SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+        },
+        # A file-backed test database lets concurrency tests share it across threads.
+        'TEST': {
+            'NAME': env.get('SQLITE_TEST_PATH', base_dir / 'test_db.sqlite3'),
+        },
+    }
+
+
+def postgres_config(env):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('POSTGRES_DB', 'riyadah_elite'),
+        'USER': env.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+        'HOST': env.get('POSTGRES_HOST', '127.0.0.1'),
+        'PORT': env.get('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': _int(env, 'POSTGRES_CONNECT_TIMEOUT', 5),
+        },
+        'TEST': {
+            'NAME': env.get('POSTGRES_TEST_DB', 'test_riyadah_elite'),
+        },
+    }
+    pool_max = env.get('DB_POOL_MAX_SIZE')
+    if pool_max:
+        # Django's pool manages connection lifetime itself; CONN_MAX_AGE must stay 0.
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': _int(env, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': int(pool_max),
+            'timeout': _int(env, 'DB_POOL_TIMEOUT', 10),
+        }
+    else:
+        config['CONN_MAX_AGE'] = _int(env, 'CONN_MAX_AGE', 60)
+    return config
+
+
+def replica_configs(base_dir, env=None):
+    """
+    Read replicas keyed by alias (``replica1``, ``replica2``, ...).
+
+    SQLite replicas come from ``SQLITE_REPLICA_PATHS`` and Postgres replicas
+    from ``POSTGRES_REPLICA_HOSTS``, both comma-separated. Keeping replicas in
+    sync is the database's job; locally, a copied SQLite file or a second
+    Postgres instance fed by streaming replication will do. In tests every
+    replica mirrors ``default``.
+    """
+    env = os.environ if env is None else env
+    primary = database_config(base_dir, env)
+    if primary['ENGINE'] == 'django.db.backends.sqlite3':
+        targets = [('NAME', path) for path in env.get('SQLITE_REPLICA_PATHS', '').split(',') if path]
+    else:
+        targets = [('HOST', host) for host in env.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host]
+
+    replicas = {}
+    for index, (key, value) in enumerate(targets, start=1):
+        replica = {**primary, key: value, 'OPTIONS': dict(primary['OPTIONS']), 'TEST': {'MIRROR': 'default'}}
+        if primary['ENGINE'] == 'django.db.backends.sqlite3':
+            # Replicas are read-only here; IMMEDIATE would take a write lock on them.
+            replica['OPTIONS'].pop('transaction_mode', None)
+        replicas[f'replica{index}'] = replica
+    return replicas
+
+
+def database_config(base_dir, env=None):
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        return sqlite_config(env, base_dir)
+    if engine == 'postgres':
+        return postgres_config(env)
+    raise ValueError(f"Unsupported DB_ENGINE {engine!r}; use 'sqlite' or 'postgres'")
@@ -0,0 +1,95 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# The replica the current request reads from, chosen once so that related reads
+# see the same lag; None means the primary. Anything outside a request
+# (management commands, tests, shells) stays on the primary.
+_read_alias = ContextVar('read_alias', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The pin travels with the client in a signed, timestamped cookie, so every
+# process honours it without a shared cache and it cannot be extended by hand.
+PIN_COOKIE = 'db_pin'
+PIN_SALT = 'backend.routers.pin'
+
+
+def _pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+class ReplicaRouter:
+    """Send reads to a replica only when the request allows it; all writes go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        # Once a request writes, its later reads must see that write.
+        _read_alias.set(None)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allow replica reads for safe-method requests from clients that have not
+    written recently.
+
+    After an unsafe request the client is pinned to the primary for
+    ``REPLICA_PIN_SECONDS``, which gives read-your-writes across replica lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self._finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self._finish(request, response)
+        return response
+
+    def _start(self, request):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        alias = None
+        if replicas and request.method in SAFE_METHODS:
+            pinned = request.get_signed_cookie(
+                PIN_COOKIE, default=None, salt=PIN_SALT, max_age=_pin_seconds()
+            ) is not None
+            alias = None if pinned else random.choice(replicas)
+        return _read_alias.set(alias)
+
+    def _finish(self, request, response):
+        if request.method not in SAFE_METHODS and getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_SALT, max_age=_pin_seconds(),
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
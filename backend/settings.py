@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'authapp.instrumentation.PerformanceMiddleware',
+    'backend.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,13 +81,123 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Engine and tuning come from the environment; see backend/database.py.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_config(BASE_DIR),
+    **replica_configs(BASE_DIR),
+}
+
+# Safe-method requests read from these; a client that just wrote is pinned to
+# the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; set REDIS_URL (needs the redis package) to share the
+# response cache across processes.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Catalog and dashboard ETags/Last-Modified are derived from cached namespace
+# versions, which every process only agrees on through a shared cache. On by
+# default with REDIS_URL; set CONDITIONAL_GET=1 for a single-process server.
+CONDITIONAL_GET = os.environ.get('CONDITIONAL_GET', '1' if os.environ.get('REDIS_URL') else '0') == '1'
+
+# How stale the in-process leaderboard may get before a full reload picks up
+# balance changes made by other processes.
+LEADERBOARD_REFRESH_SECONDS = int(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 60))
+
+# Per-request wall/SQL/serializer timing, reported at /api/metrics/ and in
+# Server-Timing headers, both for staff only (headers for everyone under DEBUG).
+
+PERFORMANCE_INSTRUMENTATION = os.environ.get('PERFORMANCE_INSTRUMENTATION', '1') == '1'
+
+# Activity logging
+# 'buffered' writes login/registration rows in batches off the request path,
+# 'sync' writes every row in the request; ledger activity (points or counts) is
+# always written in its own transaction. Journals are spooled per database.
+# The test runner switches to 'sync' with a temporary spool.
+
+ACTIVITY_LOG_MODE = os.environ.get('ACTIVITY_LOG_MODE', 'buffered')
+ACTIVITY_LOG_BUFFERED_TYPES = ['login', 'registration', 'profile_update']
+ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 500))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+ACTIVITY_LOG_SPOOL_DIR = Path(os.environ.get('ACTIVITY_LOG_SPOOL_DIR', BASE_DIR / 'var' / 'activity-spool'))
+
+TEST_RUNNER = 'backend.test_runner.TestRunner'
+
+# Activity older than this is rolled up and archived by `manage.py archive_activity`.
+ACTIVITY_RETENTION_DAYS = int(os.environ.get('ACTIVITY_RETENTION_DAYS', 90))
+ACTIVITY_ARCHIVE_DIR = Path(os.environ.get('ACTIVITY_ARCHIVE_DIR', BASE_DIR / 'var' / 'activity-archive'))
+
+# Authentication and sessions
+# Sessions are read through the cache and written through to the database;
+# the authenticated user and profile are loaded together and cached briefly.
+
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+AUTHENTICATION_BACKENDS = ['authapp.backends.ProfileModelBackend']
+
+USER_CACHE_SECONDS = int(os.environ.get('USER_CACHE_SECONDS', 30))
+
+# Password hashing
+# The preferred hasher comes first; the rest only verify existing hashes, which
+# are upgraded on the next successful login. Argon2 needs argon2-cffi installed.
+
+PASSWORD_HASHER_CHOICES = {
+    'scrypt': 'authapp.hashing.ScryptPasswordHasher',
+    'argon2': 'authapp.hashing.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
 }
 
+PASSWORD_HASHER = PASSWORD_HASHER_CHOICES[os.environ.get('PASSWORD_HASHER', 'scrypt')]
+
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in [
+        *PASSWORD_HASHER_CHOICES.values(),
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ] if hasher != PASSWORD_HASHER
+]
+
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', 1))
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 64 * 1024))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2))
+
+# At most LOGIN_HASH_WORKERS hashes run at once; callers beyond the queue get a 503.
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', 2))
+LOGIN_HASH_QUEUE_SIZE = int(os.environ.get('LOGIN_HASH_QUEUE_SIZE', 32))
+LOGIN_HASH_TIMEOUT = float(os.environ.get('LOGIN_HASH_TIMEOUT', 10))
+
+# Realtime updates
+# Server-Sent Events fan out in-process; set REALTIME_BROKER_URL to a Redis URL
+# (needs the redis package) when several processes serve the event stream.
+
+REALTIME_BROKER_URL = os.environ.get('REALTIME_BROKER_URL', '')
+REALTIME_QUEUE_SIZE = int(os.environ.get('REALTIME_QUEUE_SIZE', 100))
+REALTIME_HEARTBEAT_SECONDS = float(os.environ.get('REALTIME_HEARTBEAT_SECONDS', 15))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,5 +254,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Login and registration throttles run before any password is hashed.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '30/min'),
+        'login_username': os.environ.get('LOGIN_USERNAME_RATE', '10/min'),
+        'register_ip': os.environ.get('REGISTER_IP_RATE', '10/hour'),
+    },
+    # Proxies in front of the app that append to X-Forwarded-For. With 0 the client address is
+    # REMOTE_ADDR; anything else would let clients pick their own throttle key.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
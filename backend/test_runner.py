@@ -0,0 +1,24 @@
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run the suite with activity written synchronously into a throwaway spool.
+
+    Tests that exercise the buffered writer opt back in with ``self.settings``;
+    nothing a test logs can reach the spool a real server replays from.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._spool = tempfile.TemporaryDirectory()
+        self._activity_settings = override_settings(ACTIVITY_LOG_MODE='sync', ACTIVITY_LOG_SPOOL_DIR=self._spool.name)
+        self._activity_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._activity_settings.disable()
+        self._spool.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -9,6 +9,7 @@ urlpatterns = [
     path('api/tournaments/<int:pk>/', views.tournament_detail, name='tournament-detail'),
     path('api/tournaments/<int:pk>/join/', views.tournament_join, name='tournament-join'),
     path('api/tournaments/<int:pk>/leave/', views.tournament_leave, name='tournament-leave'),
+    path('api/tournaments/<int:pk>/roster/', views.tournament_roster, name='tournament-roster'),
     path('api/tournaments/user/', views.user_tournaments, name='user-tournaments'),
     path('api/rewards/', views.reward_list, name='reward-list'),
     path('api/rewards/claim/', views.reward_claim, name='reward-claim'),
@@ -16,4 +17,11 @@ urlpatterns = [
     path('api/games/', views.game_list, name='game-list'),
     path('api/games/<int:pk>/status/', views.game_update_status, name='game-update-status'),
     path('api/dashboard/', views.dashboard_data, name='dashboard-data'),
+    path('api/leaderboard/', views.leaderboard_top, name='leaderboard-top'),
+    path('api/leaderboard/me/', views.leaderboard_me, name='leaderboard-me'),
+    path('api/search/', views.search_catalog, name='search'),
+    path('api/cache/stats/', views.response_cache_stats, name='response-cache-stats'),
+    path('api/metrics/', views.performance_metrics, name='performance-metrics'),
+    path('api/exports/<str:kind>/', views.export_data, name='export-data'),
+    path('api/events/', views.event_stream, name='event-stream'),
 ]
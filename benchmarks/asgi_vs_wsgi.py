@@ -0,0 +1,144 @@
+"""
+Throughput of the async read views under a threaded WSGI server versus an ASGI server.
+
+Seeds (or reuses) the load-test database, then for each server and each
+concurrency level drives the async views - dashboard, tournament list and
+detail, reward list and current user - with that many concurrent logged-in
+clients and reports requests per second and p50/p95/p99 latency:
+
+    python benchmarks/asgi_vs_wsgi.py --users 2000 --concurrency 16,64,256
+
+Both servers run one process. By default WSGI is gunicorn with
+``--threads`` worker threads and ASGI is uvicorn; pass ``--wsgi-command`` or
+``--asgi-command`` (with ``{port}`` and ``{threads}`` placeholders) to
+compare other servers. Under WSGI the async views run through
+``async_to_sync`` on a worker thread; under ASGI they share one event loop.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest import BASE_DIR, UNTHROTTLED_ENV, Session, percentile, seed, setup_django
+
+SERVERS = {
+    'wsgi': ('gunicorn', '{python} -m gunicorn backend.wsgi:application --bind 127.0.0.1:{port} '
+                         '--workers 1 --threads {threads} --log-level warning'),
+    'asgi': ('uvicorn', '{python} -m uvicorn backend.asgi:application --port {port} '
+                        '--workers 1 --log-level warning'),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tournaments', type=int, default=200)
+    parser.add_argument('--rewards', type=int, default=100)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--activities-per-user', type=int, default=20)
+    parser.add_argument('--concurrency', default='16,64,256', help='Comma-separated client counts')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per route and concurrency level')
+    parser.add_argument('--threads', type=int, default=32, help='WSGI worker threads')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=str(BASE_DIR / 'var' / 'bench.sqlite3'))
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--reuse-db', action='store_true', help='Skip migrating and seeding')
+    parser.add_argument('--wsgi-command', help='Override the WSGI server command')
+    parser.add_argument('--asgi-command', help='Override the ASGI server command')
+    return parser.parse_args()
+
+
+def routes(rng, tournament_ids):
+    return [
+        ('dashboard', lambda: '/api/dashboard/'),
+        ('tournament-list', lambda: '/api/tournaments/?page_size=20'),
+        ('tournament-detail', lambda: f'/api/tournaments/{rng.choice(tournament_ids)}/'),
+        ('reward-list', lambda: '/api/rewards/?page_size=20'),
+        ('auth-user', lambda: '/api/auth/user/'),
+    ]
+
+
+def server_command(kind, args):
+    module, default = SERVERS[kind]
+    override = getattr(args, f'{kind}_command')
+    if override is None and importlib.util.find_spec(module) is None:
+        raise SystemExit(f'{module} is not installed; install it or pass --{kind}-command')
+    template = override or default
+    return shlex.split(template.format(python=sys.executable, port=args.port, threads=args.threads))
+
+
+def start(command, port):
+    server = subprocess.Popen(command, cwd=BASE_DIR, env={**os.environ, **UNTHROTTLED_ENV},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + '/api/auth/user/', timeout=1)
+        except urllib.error.HTTPError:
+            return server, base_url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f'Server did not start: {" ".join(command)}')
+
+
+def drive(sessions, path_for, count):
+    def one(i):
+        return sessions[i % len(sessions)].request('GET', path_for())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency * 1000 for latency, _ in results]
+    return {
+        'rps': round(count / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'errors': sum(1 for _, status in results if status != 200),
+    }
+
+
+def main():
+    args = parse_args()
+    setup_django(args.db)
+    if not args.reuse_db:
+        print(f'Seeding {args.users} users into {args.db}...')
+        seed(args)
+
+    from authapp.models import Tournament
+    rng = random.Random(args.seed)
+    route_list = routes(rng, list(Tournament.objects.values_list('pk', flat=True)))
+    levels = [int(level) for level in args.concurrency.split(',')]
+    commands = {kind: server_command(kind, args) for kind in SERVERS}
+
+    print(f"{'server':<6} {'clients':>7} {'route':<18} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+    for kind, command in commands.items():
+        server, base_url = start(command, args.port)
+        try:
+            for level in levels:
+                # Bench users are bench0..bench{users-1}; extra clients log in as the same users again.
+                names = [f'bench{i % args.users}' for i in range(level)]
+                with ThreadPoolExecutor(max_workers=min(level, 32)) as pool:
+                    sessions = list(pool.map(lambda name: Session(base_url, name).login(), names))
+                for name, path_for in route_list:
+                    r = drive(sessions, path_for, args.requests)
+                    print(f"{kind:<6} {level:>7} {name:<18} {r['rps']:>8} {r['p50_ms']:>8} "
+                          f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['errors']:>6}")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""
+Load test and latency benchmark for the /api/ surface.
+
+Seeds a dedicated SQLite database at the requested scale, starts a local
+server against it, drives every API route with concurrent authenticated
+sessions and reports p50/p95/p99 latency, throughput and SQL queries per
+request. Results can be saved as a baseline and later runs compared to it:
+
+    python benchmarks/loadtest.py --users 2000 --save-baseline
+    python benchmarks/loadtest.py --users 2000            # exits 1 on regression
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+BENCH_PASSWORD = 'benchpass123'
+
+# Staff-only routes are driven by this account; a bench user would only measure the 403.
+STAFF_USERNAME = 'bench-staff'
+STAFF_ROUTES = {'tournament-roster', 'cache-stats', 'metrics', 'export'}
+
+# Every benchmark client comes from 127.0.0.1, so the servers run with the login and registration throttles lifted.
+UNTHROTTLED_ENV = {
+    'LOGIN_IP_RATE': '100000/min',
+    'LOGIN_USERNAME_RATE': '100000/min',
+    'REGISTER_IP_RATE': '100000/min',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tournaments', type=int, default=200)
+    parser.add_argument('--rewards', type=int, default=100)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--activities-per-user', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=16, help='Concurrent authenticated sessions')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data and request mix')
+    parser.add_argument('--db', default=str(BASE_DIR / 'var' / 'bench.sqlite3'))
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help='Benchmark an already running server instead of starting one '
+                                      '(run it with the rates in UNTHROTTLED_ENV)')
+    parser.add_argument('--reuse-db', action='store_true', help='Skip migrating and seeding')
+    parser.add_argument('--baseline', default=str(BASE_DIR / 'benchmarks' / 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed fractional p95/throughput regression against the baseline')
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    os.environ['SQLITE_PATH'] = db_path
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+
+def seed(args):
+    """Build a fresh benchmark database with seed_data's bulk generator."""
+    from types import SimpleNamespace
+
+    from django.core.management import call_command
+
+    from seed_data import Generator
+
+    db_path = Path(args.db)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    if db_path.exists():
+        db_path.unlink()
+    call_command('migrate', verbosity=0)
+
+    Generator(seed=args.seed, prefix='bench', password=BENCH_PASSWORD).run(SimpleNamespace(
+        users=args.users, tournaments=args.tournaments, rewards=args.rewards, games=args.games,
+        participants_per_tournament=min(args.users, 30), claims_per_user=1,
+        activities_per_user=args.activities_per_user, distribution='exponential',
+    ))
+
+
+def ensure_staff_user():
+    from django.contrib.auth.models import User
+
+    user, _ = User.objects.get_or_create(username=STAFF_USERNAME, defaults={'email': f'{STAFF_USERNAME}@example.com'})
+    user.is_staff = True
+    user.set_password(BENCH_PASSWORD)
+    user.save()
+
+
+def routes(rng, ids):
+    """
+    (name, method, path factory, body factory) for every route in backend/urls.py except the admin
+    and the event stream, which never completes. ``RouteCoverageTests`` keeps the two in step.
+    """
+    tournament = lambda: rng.choice(ids['tournaments'])
+    open_tournament = lambda: rng.choice(ids['open_tournaments'] or ids['tournaments'])
+    return [
+        ('auth-user', 'GET', lambda: '/api/auth/user/', None),
+        ('auth-login', 'POST', lambda: '/api/auth/login/', 'login'),
+        ('auth-register', 'POST', lambda: '/api/auth/register/', 'register'),
+        ('auth-logout', 'POST', lambda: '/api/auth/logout/', 'logout'),
+        ('tournament-list', 'GET', lambda: '/api/tournaments/', None),
+        ('tournament-list-page', 'GET', lambda: '/api/tournaments/?page_size=20', None),
+        ('tournament-create', 'POST', lambda: '/api/tournaments/', 'tournament'),
+        ('tournament-detail', 'GET', lambda: f'/api/tournaments/{tournament()}/', None),
+        ('tournament-join', 'POST', lambda: f'/api/tournaments/{tournament()}/join/', None),
+        ('tournament-leave', 'DELETE', lambda: f'/api/tournaments/{tournament()}/leave/', None),
+        ('tournament-roster', 'POST', lambda: f'/api/tournaments/{open_tournament()}/roster/', 'roster'),
+        ('user-tournaments', 'GET', lambda: '/api/tournaments/user/', None),
+        ('reward-list', 'GET', lambda: '/api/rewards/', None),
+        ('reward-claim', 'POST', lambda: '/api/rewards/claim/', 'claim'),
+        ('user-rewards', 'GET', lambda: '/api/rewards/user/', None),
+        ('game-list', 'GET', lambda: '/api/games/', None),
+        ('game-submit', 'POST', lambda: '/api/games/', 'game'),
+        ('game-update-status', 'PUT', lambda: f'/api/games/{rng.choice(ids["games"])}/status/', 'status'),
+        ('dashboard', 'GET', lambda: '/api/dashboard/', None),
+        ('leaderboard-top', 'GET', lambda: '/api/leaderboard/', None),
+        ('leaderboard-me', 'GET', lambda: '/api/leaderboard/me/', None),
+        ('search', 'GET', lambda: '/api/search/?q=Cup', None),
+        ('cache-stats', 'GET', lambda: '/api/cache/stats/', None),
+        ('metrics', 'GET', lambda: '/api/metrics/', None),
+        ('export', 'GET', lambda: '/api/exports/activities/?gzip=1', None),
+    ]
+
+
+class Session:
+    """One logged-in client with its own cookie jar and CSRF token."""
+
+    def __init__(self, base_url, username):
+        self.base_url = base_url
+        self.username = username
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers={
+            'Content-Type': 'application/json',
+            'X-CSRFToken': self.csrf_token(),
+            'Referer': self.base_url,
+        })
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        return time.perf_counter() - start, status
+
+    def login(self):
+        _, status = self.request('POST', '/api/auth/login/', {'username': self.username, 'password': BENCH_PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Login failed for {self.username}: HTTP {status}')
+        return self
+
+
+def body_for(kind, rng, username, counter, ids):
+    if kind == 'login':
+        return {'username': username, 'password': BENCH_PASSWORD}
+    if kind == 'register':
+        name = f'bench-new-{os.getpid()}-{counter}'
+        return {'username': name, 'email': f'{name}@example.com', 'password': BENCH_PASSWORD,
+                'password2': BENCH_PASSWORD}
+    if kind == 'tournament':
+        return {'title': f'Bench Cup {counter}', 'game': 'FIFA 24', 'description': '',
+                'start_date': '2030-01-01T00:00:00Z', 'end_date': '2030-01-02T00:00:00Z'}
+    if kind == 'roster':
+        return {'usernames': [f'bench{rng.randrange(1000)}' for _ in range(5)]}
+    if kind == 'claim':
+        return {'rewardId': rng.choice(ids['rewards'])}
+    if kind == 'game':
+        return {'title': f'Bench Game {counter}', 'developer': 'Bench Studio', 'genre': 'MOBA'}
+    if kind == 'status':
+        return {'status': rng.choice(['pending', 'approved', 'testing'])}
+    return None
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def drive(base_url, sessions, route, count, rng, ids):
+    name, method, path_for, body_kind = route
+
+    def one(i):
+        session = sessions[i % len(sessions)]
+        # Logging in or out rotates the session key, which would break other
+        # requests sharing this session, so those routes get a private one.
+        if body_kind == 'login':
+            session = Session(base_url, session.username)
+        elif body_kind == 'logout':
+            session = Session(base_url, session.username).login()
+        body = body_for(body_kind, rng, session.username, i, ids)
+        return session.request(method, path_for(), body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency * 1000 for latency, _ in results]
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'throughput_rps': round(count / wall, 1),
+        'statuses': {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def count_queries(username, route_list, rng, ids):
+    """SQL queries per request, measured in-process against the same database and accounts."""
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient(HTTP_HOST='localhost')
+    user = User.objects.get(username=username)
+    staff = User.objects.get(username=STAFF_USERNAME)
+    counts = {}
+    for name, method, path_for, body_kind in route_list:
+        client.force_login(staff if name in STAFF_ROUTES else user)
+        body = body_for(body_kind, rng, username, f'q{name}', ids)
+        with CaptureQueriesContext(connection) as ctx:
+            getattr(client, method.lower())(path_for(), body, format='json')
+        counts[name] = len(ctx.captured_queries)
+    return counts
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload'],
+        cwd=BASE_DIR, env={**os.environ, **UNTHROTTLED_ENV}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + '/api/auth/user/', timeout=1)
+        except urllib.error.HTTPError:
+            return server, base_url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('Server did not start')
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current.get('queries', 0) > previous.get('queries', 0):
+            regressions.append(f"{name}: queries {previous.get('queries')} -> {current['queries']}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    setup_django(args.db)
+    if not args.url and not args.reuse_db:
+        print(f'Seeding {args.users} users into {args.db}...')
+        seed(args)
+
+    from django.db.models import F
+
+    from authapp.models import Tournament, Reward, Game
+    ensure_staff_user()
+    ids = {
+        'tournaments': list(Tournament.objects.values_list('pk', flat=True)),
+        # Rosters that no longer fit are rejected whole, so they go to tournaments with room.
+        'open_tournaments': list(Tournament.objects.filter(
+            max_participants__gte=F('participant_count') + 64
+        ).values_list('pk', flat=True)),
+        'rewards': list(Reward.objects.values_list('pk', flat=True)),
+        'games': list(Game.objects.values_list('pk', flat=True)),
+    }
+    rng = random.Random(args.seed)
+    route_list = routes(rng, ids)
+    usernames = [f'bench{i}' for i in range(args.sessions)]
+
+    queries = count_queries(usernames[0], route_list, rng, ids)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_server(args.port)
+    try:
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            sessions = list(pool.map(lambda name: Session(base_url, name).login(), usernames))
+            staff_sessions = list(pool.map(lambda _: Session(base_url, STAFF_USERNAME).login(), usernames))
+        results = {}
+        for route in route_list:
+            route_sessions = staff_sessions if route[0] in STAFF_ROUTES else sessions
+            results[route[0]] = {**drive(base_url, route_sessions, route, args.requests, rng, ids),
+                                 'queries': queries[route[0]]}
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print(f"{'route':<22} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'sql':>4}  statuses")
+    for name, r in results.items():
+        print(f"{name:<22} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+              f"{r['throughput_rps']:>8} {r['queries']:>4}  {r['statuses']}")
+
+    refused = [f"{name}: {results[name]['statuses']}" for name in sorted(STAFF_ROUTES)
+               if any(not code.startswith('2') for code in results[name]['statuses'])]
+    if refused:
+        print('\nStaff routes answered non-2xx statuses, so their timings are not of the real work:')
+        for line in refused:
+            print(f'  {line}')
+        return 1
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + '\n')
+        print(f'Saved baseline to {baseline_path}')
+        return 0
+    if baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        if regressions:
+            print('\nRegressions against baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Rows per second of the fast list serializers against the DRF serializers they replace.
+
+Seeds (or reuses) the load-test database, then for each serializer in
+``authapp.fast_serializers.FAST_SERIALIZERS`` times query + serialize +
+render of ``--rows`` rows both ways, checks the two outputs are the same
+bytes and reports the speed-up:
+
+    python benchmarks/serializers.py --users 2000 --rows 1000
+
+The DRF side uses the serializer's ``setup_eager_loading`` and
+``JSONRenderer``; the fast side uses ``FastSerializer`` and
+``FastJSONRenderer`` (orjson when installed).
+"""
+import argparse
+import sys
+import time
+
+from loadtest import BASE_DIR, seed, setup_django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tournaments', type=int, default=200)
+    parser.add_argument('--rewards', type=int, default=100)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--activities-per-user', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per serialization')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path; the best is reported')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=str(BASE_DIR / 'var' / 'bench.sqlite3'))
+    parser.add_argument('--reuse-db', action='store_true', help='Skip migrating and seeding')
+    return parser.parse_args()
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+def main():
+    args = parse_args()
+    setup_django(args.db)
+    if not args.reuse_db:
+        print(f'Seeding {args.users} users into {args.db}...')
+        seed(args)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from authapp.fast_serializers import FAST_SERIALIZERS
+    from authapp.renderers import FastJSONRenderer
+
+    mismatches = 0
+    print(f"{'serializer':<32} {'rows':>6} {'drf rows/s':>12} {'fast rows/s':>12} {'speed-up':>9}")
+    for serializer_class, fast in FAST_SERIALIZERS.items():
+        model = serializer_class.Meta.model
+        queryset = model.objects.order_by('pk')[:args.rows]
+        eager = getattr(serializer_class, 'setup_eager_loading', lambda qs: qs)(model.objects.order_by('pk'))
+
+        drf_time, expected = best_of(args.repeat, lambda: JSONRenderer().render(
+            serializer_class(eager[:args.rows], many=True).data))
+        fast_time, actual = best_of(args.repeat, lambda: FastJSONRenderer().render(fast.serialize(queryset)))
+
+        rows = queryset.count()
+        same = actual == expected
+        mismatches += not same
+        print(f"{serializer_class.__name__:<32} {rows:>6} {rows / drf_time:>12.0f} {rows / fast_time:>12.0f} "
+              f"{drf_time / fast_time:>8.1f}x{'' if same else '  OUTPUT DIFFERS'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
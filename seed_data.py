@@ -1,14 +1,23 @@
+import argparse
 import os
+import random
+import time
 import django
 from datetime import datetime, timedelta
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
 from authapp.models import (
-    UserProfile, Tournament, Reward, Game
+    UserProfile, UserStats, Tournament, TournamentParticipant,
+    Reward, UserReward, Game, UserActivity
 )
+from authapp.search import rebuild_index
+from authapp.services import rebuild_user_stats, sync_participant_counts
 
 def seed_database():
     print("Seeding database with sample data...")
@@ -190,5 +199,202 @@ def seed_database():
     print("  Admin user: admin / admin123")
     print("  Host user: host / host123")
 
+GAMES = ['FIFA 24', 'Call of Duty Warzone', 'Rocket League', 'Valorant', 'League of Legends']
+GENRES = ['MOBA', 'Adventure', 'Racing', 'Shooter', 'Strategy']
+REWARD_CATEGORIES = ['Gaming Gear', 'Gift Cards', 'Tournament']
+
+
+def draw(rng, distribution, mean):
+    """A non-negative integer with the given mean, drawn from ``distribution``."""
+    if mean <= 0:
+        return 0
+    if distribution == 'fixed':
+        return int(mean)
+    if distribution == 'uniform':
+        return rng.randint(0, int(2 * mean))
+    if distribution == 'exponential':
+        return int(rng.expovariate(1 / mean))
+    if distribution == 'pareto':
+        # Heavy tail: most rows get little, a few get a lot.
+        return int(mean * 0.5 * rng.paretovariate(2))
+    raise ValueError(f'Unknown distribution: {distribution}')
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Generator:
+    """
+    Bulk synthetic data for capacity testing.
+
+    Everything is written with bulk_create in chunks. Users share one
+    precomputed password hash, and the per-row post_save signals that normally
+    create UserProfile and UserStats are bypassed by creating those rows in
+    bulk alongside each user chunk. UserStats counters are rebuilt once at
+    the end.
+    """
+
+    def __init__(self, seed=42, chunk_size=5000, prefix='player', password='testpass123', log=print):
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.password_hash = make_password(password)
+        self.log = log
+
+    def _timed(self, label, fn, *args):
+        start = time.perf_counter()
+        count = fn(*args)
+        self.log(f"{label}: {count} rows in {time.perf_counter() - start:.1f}s")
+        return count
+
+    def users(self, count):
+        if User.objects.filter(username=f"{self.prefix}0").exists():
+            raise SystemExit(f"Users with prefix '{self.prefix}' already exist; pass --prefix")
+        ids, usernames = [], {}
+        for start in range(0, count, self.chunk_size):
+            names = [f"{self.prefix}{i}" for i in range(start, min(count, start + self.chunk_size))]
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(username=name, email=f"{name}@example.com", password=self.password_hash)
+                    for name in names
+                ])
+                chunk = dict(User.objects.filter(username__in=names).values_list('pk', 'username'))
+                chunk_ids = sorted(chunk)
+                UserProfile.objects.bulk_create([
+                    UserProfile(user_id=pk, points=self.rng.randint(0, 2000)) for pk in chunk_ids
+                ])
+                UserStats.objects.bulk_create([UserStats(user_id=pk) for pk in chunk_ids])
+            ids.extend(chunk_ids)
+            usernames.update(chunk)
+        self.user_ids = ids
+        self.usernames = usernames
+        return len(ids)
+
+    def catalog(self, tournaments, rewards, games):
+        now = timezone.now()
+        rng = self.rng
+        Tournament.objects.bulk_create((
+            Tournament(
+                title=f"{rng.choice(GAMES)} Cup {i}", game=rng.choice(GAMES),
+                start_date=now + timedelta(days=rng.randint(-30, 60)),
+                end_date=now + timedelta(days=rng.randint(61, 90)),
+                prize_pool=f"${rng.choice([500, 1000, 2500, 5000])}",
+                max_participants=rng.choice([16, 32, 64, 128, 256]),
+                status=rng.choice(['upcoming', 'active', 'completed']),
+                created_by_id=rng.choice(self.user_ids)
+            )
+            for i in range(tournaments)
+        ), batch_size=self.chunk_size)
+        Reward.objects.bulk_create((
+            Reward(
+                title=f"Reward {i}", points=rng.randint(100, 1000),
+                category=rng.choice(REWARD_CATEGORIES), stock=rng.randint(0, 200)
+            )
+            for i in range(rewards)
+        ), batch_size=self.chunk_size)
+        Game.objects.bulk_create((
+            Game(
+                title=f"Game {i}", developer=f"Studio {rng.randint(1, 200)}", genre=rng.choice(GENRES),
+                status=rng.choice(['pending', 'approved', 'testing', 'completed']),
+                submitted_by_id=rng.choice(self.user_ids)
+            )
+            for i in range(games)
+        ), batch_size=self.chunk_size)
+        return tournaments + rewards + games
+
+    def participants(self, mean, distribution):
+        tournaments = list(Tournament.objects.values_list('pk', 'title', 'max_participants'))
+
+        def rows():
+            for pk, title, capacity in tournaments:
+                size = min(capacity, draw(self.rng, distribution, mean), len(self.user_ids))
+                for user_id in self.rng.sample(self.user_ids, size):
+                    yield TournamentParticipant(user_id=user_id, tournament_id=pk), UserActivity(
+                        user_id=user_id, tournament_id=pk, activity_type='tournament_join',
+                        description=f"Joined tournament: {title}", points_change=10
+                    )
+
+        return self._bulk_pairs(TournamentParticipant, rows())
+
+    def claims(self, mean, distribution):
+        rewards = list(Reward.objects.values_list('pk', 'title', 'points'))
+
+        def rows():
+            for user_id in self.user_ids:
+                for pk, title, points in self.rng.sample(rewards, min(len(rewards), draw(self.rng, distribution, mean))):
+                    yield UserReward(user_id=user_id, reward_id=pk), UserActivity(
+                        user_id=user_id, reward_id=pk, activity_type='reward_claim',
+                        description=f"Claimed reward: {title}", points_change=-points
+                    )
+
+        return self._bulk_pairs(UserReward, rows())
+
+    def activities(self, mean, distribution):
+        def rows():
+            for user_id in self.user_ids:
+                for _ in range(draw(self.rng, distribution, mean)):
+                    yield UserActivity(
+                        user_id=user_id, activity_type='login',
+                        description=f"User {self.usernames[user_id]} logged in"
+                    )
+
+        count = 0
+        for chunk in chunked(rows(), self.chunk_size):
+            UserActivity.objects.bulk_create(chunk)
+            count += len(chunk)
+        return count
+
+    def _bulk_pairs(self, model, pairs):
+        """Insert (row, activity) pairs so every generated row has its matching activity."""
+        count = 0
+        for chunk in chunked(pairs, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create([row for row, _ in chunk])
+                UserActivity.objects.bulk_create([activity for _, activity in chunk])
+            count += len(chunk)
+        return count
+
+    def run(self, args):
+        self._timed('users', self.users, args.users)
+        self._timed('catalog', self.catalog, args.tournaments, args.rewards, args.games)
+        self._timed('participants', self.participants, args.participants_per_tournament, args.distribution)
+        self._timed('participant counts', sync_participant_counts)
+        self._timed('claims', self.claims, args.claims_per_user, args.distribution)
+        self._timed('activities', self.activities, args.activities_per_user, args.distribution)
+        self._timed('stats', rebuild_user_stats)
+        self._timed('search index', rebuild_index)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Seed sample data, or generate synthetic data at scale when --users is given"
+    )
+    parser.add_argument('--users', type=int, help="Generate this many synthetic users")
+    parser.add_argument('--tournaments', type=int, default=1000)
+    parser.add_argument('--rewards', type=int, default=200)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--participants-per-tournament', type=float, default=40)
+    parser.add_argument('--claims-per-user', type=float, default=1)
+    parser.add_argument('--activities-per-user', type=float, default=20)
+    parser.add_argument('--distribution', choices=['fixed', 'uniform', 'exponential', 'pareto'],
+                        default='exponential')
+    parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed yields the same data")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--prefix', default='player', help="Username prefix for generated users")
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    seed_database()
+    args = parse_args()
+    if args.users is None:
+        seed_database()
+    else:
+        Generator(seed=args.seed, chunk_size=args.chunk_size, prefix=args.prefix).run(args)